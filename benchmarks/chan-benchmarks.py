@@ -0,0 +1,144 @@
+import argparse
+import json
+import platform
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Dict, List, Any
+
+import numpy as np
+import pandas as pd
+
+from pychanlun.chan import Chan
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+SIZES = (10_000, 100_000, 1_000_000, 10_000_000)
+SESSION_MINUTES = 390
+STAGES = (
+    ('Stock', ('sources',)),
+    ('Stick', ('sticks',)),
+    ('Fractal', ('fractals',)),
+    ('Stroke', ('strokes',)),
+    ('Segment', ('segments',)),
+    ('Pivot', ('stroke_pivots', 'segment_pivots')),
+    ('Signal', ('stroke_signals', 'segment_signals'))
+)
+GETTERS = (
+    'get_sources', 'get_sticks', 'get_fractals', 'get_strokes', 'get_stroke_pivots', 'get_stroke_pivot_trends',
+    'get_stroke_pivot_signals', 'get_segments', 'get_segment_pivots', 'get_segment_pivot_trends',
+    'get_segment_pivot_signals'
+)
+
+
+def generate_ohlcv(bars: int, seed: int = 0, start: str = '2000-01-03', price: float = 100.0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+
+    days, minutes = np.divmod(np.arange(bars), SESSION_MINUTES)
+    dates = pd.bdate_range(start, periods=int(days[-1]) + 1 if bars else 0)
+    index = dates[days] + pd.to_timedelta(570 + minutes, unit='min')
+
+    switches = rng.random(bars) < 1 / (5 * SESSION_MINUTES)
+    volatility = np.where(np.cumsum(switches) % 2 == 0, 0.0006, 0.0018)
+    gaps = np.where(minutes == 0, rng.standard_normal(bars) * 0.01, 0.0)
+    gaps[0] = 0.0
+    returns = rng.standard_normal(bars) * volatility
+
+    opens = price * np.exp(np.cumsum(gaps + np.concatenate(([0.0], returns[:-1]))))
+    closes = opens * np.exp(returns)
+    highs = np.maximum(opens, closes) * np.exp(np.abs(rng.standard_normal(bars)) * volatility / 2)
+    lows = np.minimum(opens, closes) * np.exp(-np.abs(rng.standard_normal(bars)) * volatility / 2)
+    volumes = rng.lognormal(8, 1, bars) * (1 + 2 * np.abs(np.cos(np.pi * minutes / SESSION_MINUTES)))
+
+    return pd.DataFrame({
+        'Open': opens.round(2),
+        'High': np.maximum(highs.round(2), np.maximum(opens, closes).round(2)),
+        'Low': np.minimum(lows.round(2), np.minimum(opens, closes).round(2)),
+        'Close': closes.round(2),
+        'Volume': volumes.astype(np.int64)
+    }, index=pd.DatetimeIndex(index, name='Datetime'))
+
+
+def peak_memory() -> Any:
+    if resource is None:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024
+
+
+def benchmark(bars: int, seed: int, repeat: int) -> Dict[str, Any]:
+    df = generate_ohlcv(bars, seed)
+    baseline = peak_memory()
+
+    stages: Dict[str, List[float]] = {name: [] for name, _ in STAGES}
+    getters: Dict[str, List[float]] = {name: [] for name in GETTERS}
+    counts: Dict[str, int] = {}
+    for _ in range(repeat):
+        chan = Chan('BENCH', {'1m': df.copy()})
+        for name, layers in STAGES:
+            start = time.perf_counter()
+            for layer in layers:
+                getattr(chan, layer)['1m']
+            stages[name].append(time.perf_counter() - start)
+
+        for name in GETTERS:
+            start = time.perf_counter()
+            result = getattr(chan, name)('1m')
+            getters[name].append(time.perf_counter() - start)
+            counts[name] = 0 if result is None else len(result)
+
+    def summarize(times: List[float]) -> Dict[str, float]:
+        seconds = min(times)
+        return {'seconds': seconds, 'bars_per_second': bars / seconds if seconds > 0 else None}
+
+    stage_results = {name: summarize(times) for name, times in stages.items()}
+    stage_results['Chan'] = summarize([sum(times) for times in zip(*getters.values())])
+    return {
+        'bars': bars,
+        'seed': seed,
+        'repeat': repeat,
+        'total_seconds': sum(result['seconds'] for result in stage_results.values()),
+        'stages': stage_results,
+        'getters': {name: dict(summarize(times), rows=counts[name]) for name, times in getters.items()},
+        'baseline_memory_mb': baseline,
+        'peak_memory_mb': peak_memory()
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmark each PyChanLun stage on synthetic OHLCV bars.')
+    parser.add_argument('--bars', type=int, nargs='+', default=list(SIZES))
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--output', default=None)
+    args = parser.parse_args()
+
+    results = []
+    for bars in args.bars:
+        with ProcessPoolExecutor(1, mp_context=get_context('spawn')) as executor:
+            result = executor.submit(benchmark, bars, args.seed, args.repeat).result()
+        results.append(result)
+        print(f"{bars} bars: {result['total_seconds']:.3f}s, peak {result['peak_memory_mb']} MB", file=sys.stderr)
+
+    report = json.dumps({
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'results': results
+    }, indent=2)
+
+    if args.output is None:
+        print(report)
+    else:
+        with open(args.output, 'w') as f:
+            f.write(report + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -1 +1,9 @@
-from pychanlun.chan import Chan
\ No newline at end of file
+from pychanlun.cache import LayerCache
+from pychanlun.chan import Chan
+from pychanlun.export import ChanExport
+from pychanlun.feed import ChanFeed, FeedEvent
+from pychanlun.indicator import BollingerBands, Macd, MovingAverage
+from pychanlun.mapped import MappedSource
+from pychanlun.replay import ChanReplay, ReplayAction
+from pychanlun.screen import ChanScreen
+from pychanlun.universe import ChanUniverse
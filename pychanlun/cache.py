@@ -0,0 +1,213 @@
+import dataclasses
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from functools import lru_cache
+from itertools import chain
+from typing import Dict, Optional, List, Tuple, Any, Callable, Sequence
+
+import numpy as np
+import pandas as pd
+
+FORMAT_VERSION = 3
+COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+PARAMETERS = ('indicators', 'MIN_LENGTH', 'inplace')
+SCALAR_TYPES = {bool, int, float, str, type(None), np.float64}
+
+
+class LayerCache:
+
+    def __init__(self, directory: str, max_bytes: Optional[int] = None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def series(self, stock: Any, interval: str) -> str:
+        parameters = [(name, getattr(stock, name, None)) for name in PARAMETERS]
+        key = repr((FORMAT_VERSION, type(stock).__qualname__, stock.symbol, interval, parameters))
+        return hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+
+    def load(self, series: str, source_df: pd.DataFrame,
+             types: Sequence[type] = ()) -> Optional[Tuple[int, Dict[str, Any]]]:
+        for size, digest, path in self._entries(series):
+            if size <= len(source_df) and digest == self._hash_sources(source_df, size):
+                try:
+                    values = self._read_entry(path, {cls.__name__: cls for cls in types})
+                except (OSError, ValueError, KeyError, TypeError):
+                    continue
+                os.utime(path)
+                return size, values
+        return None
+
+    def store(self, series: str, source_df: pd.DataFrame, values: Dict[str, Any]) -> None:
+        digest = self._hash_sources(source_df, len(source_df))
+        if digest is None:
+            return
+
+        path = os.path.join(self.directory, series, f'{len(source_df)}-{digest}')
+        if os.path.isdir(path):
+            os.utime(path)
+            return
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp = tempfile.mkdtemp(dir=os.path.dirname(path), prefix='.')
+        try:
+            self._write_entry(temp, values)
+            os.replace(temp, path)
+        except TypeError:
+            shutil.rmtree(temp, ignore_errors=True)
+            return
+        except OSError:
+            shutil.rmtree(temp, ignore_errors=True)
+            if not os.path.isdir(path):
+                raise
+        self._evict()
+
+    def clear(self) -> None:
+        shutil.rmtree(self.directory, ignore_errors=True)
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _entries(self, series: str) -> List[Tuple[int, str, str]]:
+        directory = os.path.join(self.directory, series)
+        if not os.path.isdir(directory):
+            return []
+
+        entries = []
+        for name in os.listdir(directory):
+            size, _, digest = name.partition('-')
+            if size.isdigit() and digest:
+                entries.append((int(size), digest, os.path.join(directory, name)))
+        return sorted(entries, reverse=True)
+
+    @staticmethod
+    def _hash_sources(source_df: pd.DataFrame, size: int) -> Optional[str]:
+        columns = {str(column).lower(): column for column in source_df.columns}
+        if any(column not in columns for column in COLUMNS) or not isinstance(source_df.index, pd.DatetimeIndex):
+            return None
+
+        digest = hashlib.blake2b(digest_size=16)
+        index = source_df.index[:size]
+        digest.update(str(index.dtype).encode())
+        digest.update(np.ascontiguousarray(index.asi8))
+        for column in COLUMNS:
+            values = np.ascontiguousarray(np.asarray(source_df[columns[column]])[:size])
+            digest.update(values.dtype.str.encode())
+            digest.update(values)
+        return digest.hexdigest()
+
+    @staticmethod
+    def _write_entry(path: str, values: Dict[str, Any]) -> None:
+        names: List[str] = []
+
+        def save(array: np.ndarray) -> str:
+            if array.dtype.hasobject:
+                raise TypeError(f"Cannot cache arrays of dtype {array.dtype}")
+            name = f'{len(names)}.npy'
+            np.save(os.path.join(path, name), array, allow_pickle=False)
+            names.append(name)
+            return name
+
+        state = json.dumps({name: _encode(value, save) for name, value in values.items()})
+        with open(os.path.join(path, 'state.json'), 'w') as f:
+            f.write(state)
+
+    @staticmethod
+    def _read_entry(path: str, types: Dict[str, type]) -> Dict[str, Any]:
+        with open(os.path.join(path, 'state.json')) as f:
+            state = json.load(f)
+
+        def load(name: str) -> np.ndarray:
+            if os.path.basename(name) != name:
+                raise ValueError(f"Invalid array file: {name}")
+            return np.load(os.path.join(path, name), mmap_mode='r', allow_pickle=False)
+
+        return {name: _decode(value, load, types) for name, value in state.items()}
+
+    def _evict(self) -> None:
+        if self.max_bytes is None:
+            return
+
+        entries, total = [], 0
+        for series in os.listdir(self.directory):
+            directory = os.path.join(self.directory, series)
+            if not os.path.isdir(directory):
+                continue
+            for name in os.listdir(directory):
+                path = os.path.join(directory, name)
+                if name.startswith('.') or not os.path.isdir(path):
+                    continue
+                size = sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+                entries.append((os.stat(path).st_mtime, size, path))
+                total += size
+
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+
+
+def _encode(value: Any, save: Callable[[np.ndarray], str]) -> Any:
+    if isinstance(value, np.ndarray):
+        return {'array': save(value)}
+    if isinstance(value, pd.DataFrame):
+        tz = None if value.index.tz is None else str(value.index.tz)
+        index = value.index if tz is None else value.index.tz_convert(None)
+        return {'frame': [list(value.columns), value.index.name, tz, save(index.to_numpy()),
+                          [save(value[column].to_numpy()) for column in value.columns]]}
+    if _is_record(value):
+        return {'type': type(value).__name__, 'values': [_encode(item, save) for item in _record_values(value)]}
+    if isinstance(value, dict):
+        return {'dict': [[key, _encode(item, save)] for key, item in value.items()]}
+    if isinstance(value, list) and value and _is_record(value[0]) and set(map(type, value)) == {type(value[0])}:
+        rows = value if isinstance(value[0], tuple) else [_record_values(item) for item in value]
+        if set(map(type, chain.from_iterable(rows))) <= SCALAR_TYPES:
+            return {'records': type(value[0]).__name__, 'values': rows}
+    if isinstance(value, (list, tuple)):
+        return {'tuple' if isinstance(value, tuple) else 'list': [_encode(item, save) for item in value]}
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if isinstance(value, (float, np.floating)):
+        return float(value)
+    if value is None or isinstance(value, str):
+        return value
+    raise TypeError(f"Cannot cache values of type {type(value).__name__}")
+
+
+def _is_record(value: Any) -> bool:
+    return isinstance(value, tuple) and hasattr(value, '_fields') or dataclasses.is_dataclass(value)
+
+
+@lru_cache(maxsize=None)
+def _field_names(cls: type) -> Tuple[str, ...]:
+    return tuple(item.name for item in dataclasses.fields(cls))
+
+
+def _record_values(value: Any) -> Tuple[Any, ...]:
+    return value if isinstance(value, tuple) else tuple(getattr(value, name) for name in _field_names(type(value)))
+
+
+def _decode(value: Any, load: Callable[[str], np.ndarray], types: Dict[str, type]) -> Any:
+    if not isinstance(value, dict):
+        return value
+    if 'array' in value:
+        return load(value['array'])
+    if 'frame' in value:
+        columns, name, tz, index, values = value['frame']
+        index = pd.DatetimeIndex(load(index), name=name)
+        return pd.DataFrame({column: load(path) for column, path in zip(columns, values)},
+                            index=index if tz is None else index.tz_localize('UTC').tz_convert(tz))
+    if 'type' in value:
+        return types[value['type']](*(_decode(item, load, types) for item in value['values']))
+    if 'records' in value:
+        cls = types[value['records']]
+        return [cls(*row) for row in value['values']]
+    if 'dict' in value:
+        return {key: _decode(item, load, types) for key, item in value['dict']}
+    if 'tuple' in value:
+        return tuple(_decode(item, load, types) for item in value['tuple'])
+    return [_decode(item, load, types) for item in value['list']]
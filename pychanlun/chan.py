@@ -1,121 +1,438 @@
-from typing import Optional
+from concurrent.futures import Executor
+from datetime import datetime, tzinfo
+from functools import partial
+from typing import Dict, Optional, List, Tuple, Any, Callable, Sequence, Union
 
+import numpy as np
 import pandas as pd
 
+from pychanlun.cache import LayerCache
+from pychanlun.indicator import Indicator
 from pychanlun.signal import Signal
+from pychanlun.stock import Layer, Revision
+
+TimeLike = Union[str, datetime, np.datetime64, pd.Timestamp]
+
+MEMBERSHIP_LAYERS = ('sticks', 'strokes', 'segments', 'stroke_pivots', 'segment_pivots')
+MEMBERSHIP_DTYPE = np.dtype([(layer[:-1], np.int32) for layer in MEMBERSHIP_LAYERS])
+
+CHANGE_LAYERS = {
+    'strokes': 'strokes',
+    'segments': 'segments',
+    'stroke_pivots': 'stroke_pivots',
+    'segment_pivots': 'segment_pivots',
+    'stroke_pivot_signals': 'stroke_signals',
+    'segment_pivot_signals': 'segment_signals'
+}
+
+NESTING_LAYERS = ('strokes', 'segments', 'stroke_pivots', 'segment_pivots')
+NESTING_DTYPE = np.dtype([('start', np.int64), ('end', np.int64), ('first', np.int64), ('last', np.int64)])
 
 
 class Chan(Signal):
 
-    def get_sources(self, interval: str) -> Optional[pd.DataFrame]:
-        return self.sources[interval]
+    def __init__(self, symbol: str, source: Dict[str, pd.DataFrame], executor: Optional[Executor] = None,
+                 cache: Optional[LayerCache] = None, inplace: bool = True,
+                 indicators: Optional[Sequence[Indicator]] = None):
+        self.memberships: Dict[str, Optional[np.ndarray]] = Layer(self._compute_memberships, 'sticks')
+        self._frames: Dict[str, Dict[str, Tuple[Any, pd.DataFrame]]] = {}
+        self._nestings: Dict[Tuple[str, str, str, str], Tuple[Tuple[Any, ...], np.ndarray]] = {}
+        super().__init__(symbol, source, executor, cache, inplace, indicators)
 
-    def get_sticks(self, interval: str) -> Optional[pd.DataFrame]:
+    def get_sources(self, interval: str, start: Optional[TimeLike] = None, end: Optional[TimeLike] = None,
+                    last_n: Optional[int] = None) -> Optional[pd.DataFrame]:
         source_df = self.sources[interval]
-        stick_df = self.sticks[interval]
-        if source_df is None or stick_df is None:
-            return None
+        if source_df is None or source_df.empty:
+            return source_df
+        if self.inplace:
+            window = self._find_window(interval, start, end, last_n)
+            return source_df if window is None else source_df.iloc[window[0]:window[1]]
 
-        return source_df[[]].join(stick_df, how='left')
+        return self._get_frame(interval, 'sources', source_df, self._format_sources, start, end, last_n)
 
-    def get_fractals(self, interval: str) -> Optional[pd.DataFrame]:
-        fractal_df = self.fractals[interval]
-        if fractal_df is None:
-            return None
+    def get_sticks(self, interval: str, start: Optional[TimeLike] = None, end: Optional[TimeLike] = None,
+                   last_n: Optional[int] = None) -> Optional[pd.DataFrame]:
+        return self._get_frame(interval, 'sticks', self.sticks[interval], self._format_sticks, start, end, last_n)
 
-        has_fractal = fractal_df['high'].notna() | fractal_df['low'].notna()
-        return fractal_df[has_fractal]
+    def get_fractals(self, interval: str, start: Optional[TimeLike] = None, end: Optional[TimeLike] = None,
+                     last_n: Optional[int] = None) -> Optional[pd.DataFrame]:
+        return self._get_frame(interval, 'fractals', self.fractals[interval], self._format_fractals, start, end, last_n)
 
-    def get_strokes(self, interval: str) -> Optional[pd.DataFrame]:
-        stroke_df = self.strokes[interval]
-        if stroke_df is None:
-            return None
+    def get_strokes(self, interval: str, start: Optional[TimeLike] = None, end: Optional[TimeLike] = None,
+                    last_n: Optional[int] = None) -> Optional[pd.DataFrame]:
+        return self._get_frame(interval, 'strokes', self.strokes[interval],
+                               partial(self._format_lines, name='stroke'), start, end, last_n)
 
-        stroke_df = pd.DataFrame(stroke_df)
-        stroke_df['stroke'] = stroke_df['high'].fillna(stroke_df['low'])
-        return stroke_df[['stroke']]
+    def get_stroke_pivots(self, interval: str, start: Optional[TimeLike] = None, end: Optional[TimeLike] = None,
+                          last_n: Optional[int] = None) -> Optional[pd.DataFrame]:
+        return self._get_frame(interval, 'stroke_pivots', self.stroke_pivots[interval], self._format_pivots,
+                               start, end, last_n)
 
-    def get_stroke_pivots(self, interval: str) -> Optional[pd.DataFrame]:
-        pivot_df = self.stroke_pivots[interval]
-        if pivot_df is None:
-            return None
+    def get_stroke_pivot_trends(self, interval: str, start: Optional[TimeLike] = None, end: Optional[TimeLike] = None,
+                                last_n: Optional[int] = None) -> Optional[pd.DataFrame]:
+        return self._get_frame(interval, 'stroke_pivot_trends', self.stroke_pivots[interval], self._format_trends,
+                               start, end, last_n)
 
-        return self._format_pivots(pivot_df)
+    def get_stroke_pivot_signals(self, interval: str, start: Optional[TimeLike] = None, end: Optional[TimeLike] = None,
+                                 last_n: Optional[int] = None) -> Optional[pd.DataFrame]:
+        return self._get_frame(interval, 'stroke_pivot_signals', self.stroke_signals[interval],
+                               partial(self._format_signals, name='stroke'), start, end, last_n)
 
-    def get_stroke_pivot_trends(self, interval: str) -> Optional[pd.DataFrame]:
-        pivot_df = self.stroke_pivots[interval]
-        if pivot_df is None:
-            return None
+    def get_segments(self, interval: str, start: Optional[TimeLike] = None, end: Optional[TimeLike] = None,
+                     last_n: Optional[int] = None) -> Optional[pd.DataFrame]:
+        return self._get_frame(interval, 'segments', self.segments[interval],
+                               partial(self._format_lines, name='segment'), start, end, last_n)
+
+    def get_segment_pivots(self, interval: str, start: Optional[TimeLike] = None, end: Optional[TimeLike] = None,
+                           last_n: Optional[int] = None) -> Optional[pd.DataFrame]:
+        return self._get_frame(interval, 'segment_pivots', self.segment_pivots[interval], self._format_pivots,
+                               start, end, last_n)
+
+    def get_segment_pivot_trends(self, interval: str, start: Optional[TimeLike] = None, end: Optional[TimeLike] = None,
+                                 last_n: Optional[int] = None) -> Optional[pd.DataFrame]:
+        return self._get_frame(interval, 'segment_pivot_trends', self.segment_pivots[interval], self._format_trends,
+                               start, end, last_n)
+
+    def get_segment_pivot_signals(self, interval: str, start: Optional[TimeLike] = None, end: Optional[TimeLike] = None,
+                                  last_n: Optional[int] = None) -> Optional[pd.DataFrame]:
+        return self._get_frame(interval, 'segment_pivot_signals', self.segment_signals[interval],
+                               partial(self._format_signals, name='segment'), start, end, last_n)
 
-        return self._format_trends(pivot_df[1:-1])
+    def get_memberships(self, interval: str, start: Optional[TimeLike] = None, end: Optional[TimeLike] = None,
+                        last_n: Optional[int] = None) -> Optional[pd.DataFrame]:
+        return self._get_frame(interval, 'memberships', self.memberships[interval], self._format_memberships,
+                               start, end, last_n)
 
-    def get_stroke_pivot_signals(self, interval: str) -> Optional[pd.DataFrame]:
-        signal_df = self.stroke_signals[interval]
-        if signal_df is None:
+    def get_membership(self, interval: str, positions: Union[int, np.ndarray]) -> Optional[np.ndarray]:
+        memberships = self.memberships[interval]
+        return None if memberships is None else memberships[positions].copy()
+
+    def get_nestings(self, interval: str, layer: str, lower_interval: str, lower_layer: str) -> Optional[pd.DataFrame]:
+        key = (interval, layer, lower_interval, lower_layer)
+        values = self._nesting_values(*key)
+        if values[0] is None or values[1] is None:
             return None
 
-        return self._format_signals(signal_df, 'stroke')
+        cached = self._nestings.get(key)
+        if cached is None or any(a is not b for a, b in zip(cached[0], values)):
+            cached = self._nestings[key] = (values, self._find_nestings(*key, slice(None)))
+        nestings = cached[1]
+        starts = self._find_bounds(values[0], layer)[0]
+        return self._to_frame({name: nestings[name] for name in NESTING_DTYPE.names},
+                              self._bars(interval).index[starts])
 
-    def get_segments(self, interval: str) -> Optional[pd.DataFrame]:
-        segment_df = self.segments[interval]
-        if segment_df is None:
+    def get_nested(self, interval: str, layer: str, row: int, lower_interval: str,
+                   lower_layer: str) -> Optional[pd.DataFrame]:
+        values = self._nesting_values(interval, layer, lower_interval, lower_layer)
+        if values[0] is None or values[1] is None:
             return None
 
-        segment_df = pd.DataFrame(segment_df)
-        segment_df['segment'] = segment_df['high'].fillna(segment_df['low'])
-        return segment_df[['segment']]
+        nesting = self._find_nestings(interval, layer, lower_interval, lower_layer, slice(row, row + 1 or None))
+        if len(nesting) == 0:
+            raise IndexError(f"No {layer} at row {row} of interval {interval}")
+        frame = getattr(self, f'get_{lower_layer}')(lower_interval)
+        return None if frame is None else frame.iloc[nesting['first'][0]:nesting['last'][0]]
+
+    def get_changes(self, interval: str, consumer: str,
+                    layers: Sequence[str] = tuple(CHANGE_LAYERS)) -> Dict[str, Tuple[int, pd.DataFrame]]:
+        changes = {}
+        with self._lock(interval):
+            for name in layers:
+                layer = CHANGE_LAYERS[name]
+                revision = self.take_revision(interval, layer, consumer)
+                if revision is None:
+                    continue
+
+                row, previous, items = revision
+                changes[name] = row, self.format_changes(interval, name, previous[:0] if items is None else items)
+        return changes
+
+    @property
+    def intervals(self) -> List[str]:
+        return list(self._raw_sources.keys())
+
+    def get_index(self, interval: str) -> Optional[pd.DatetimeIndex]:
+        bars = self._bars(interval)
+        return None if bars is None else bars.index
+
+    def take_revision(self, interval: str, layer: str,
+                      consumer: str) -> Optional[Tuple[int, Optional[np.ndarray], Optional[np.ndarray]]]:
+        with self._lock(interval):
+            items = getattr(self, layer)[interval]
+            size = 0 if items is None else len(items)
+            changed = self._take_changed(interval, layer, consumer, size)
+            revisions = self._consumed.setdefault((interval, layer), {})
+            revision = revisions.get(consumer)
+            revisions[consumer] = Revision(items, size)
+            if revision is None or revision.items is None:
+                return None if items is None else (0, None, items)
+
+            unit = 2 if layer.endswith('pivots') else 1
+            count = len(revision.items)
+            size = min(count, size)
+            lower = min(changed, size)
+            lower -= lower % unit
+            previous = self._restore_revision(revision, lower)
+            changed = size
+            if lower < size:
+                differences = np.flatnonzero(self.find_differences(previous[:size - lower], items[lower:size]))
+                changed = lower + int(differences[0]) if len(differences) > 0 else size
+            if changed == count and changed == len(items if items is not None else ()):
+                return None
+
+            row = changed // unit
+            start = unit * row
+            return row, previous[start - lower:], None if items is None else items[start:]
+
+    @staticmethod
+    def find_differences(previous: np.ndarray, items: np.ndarray) -> np.ndarray:
+        size = len(items)
+        previous = np.ascontiguousarray(previous).view(np.uint8).reshape(size, -1)
+        return (np.ascontiguousarray(items).view(np.uint8).reshape(size, -1) != previous).any(axis=1)
+
+    def format_changes(self, interval: str, name: str, items: np.ndarray) -> pd.DataFrame:
+        if name.endswith('signals'):
+            return self._format_signals(interval, items, None, name=name.split('_')[0])
+        if name.endswith('pivots'):
+            return self._format_pivots(interval, items, None)
+        return self._format_lines(interval, items, None, name=name[:-1])
+
+    @staticmethod
+    def to_timestamp(value: TimeLike, tz: Optional[tzinfo]) -> pd.Timestamp:
+        timestamp = pd.Timestamp(value)
+        if tz is not None and timestamp.tz is None:
+            return timestamp.tz_localize(tz)
+        return timestamp
+
+    def _invalidate_interval(self, interval: str) -> None:
+        super()._invalidate_interval(interval)
+        self.memberships.invalidate(interval)
+        self._frames.pop(interval, None)
+        for key in [key for key in self._nestings if interval in (key[0], key[2])]:
+            del self._nestings[key]
+
+    def _detach_interval(self, interval: str) -> Dict[str, Any]:
+        values = super()._detach_interval(interval)
+        values.pop('_frames', None)
+        return values
+
+    def _nesting_values(self, interval: str, layer: str, lower_interval: str, lower_layer: str) -> Tuple[Any, ...]:
+        for name in (layer, lower_layer):
+            if name not in NESTING_LAYERS:
+                raise ValueError(f"Nesting layer must be one of {NESTING_LAYERS}, got {name}")
+        return (getattr(self, layer)[interval], self._bars(lower_interval),
+                getattr(self, lower_layer)[lower_interval])
+
+    def _find_nestings(self, interval: str, layer: str, lower_interval: str, lower_layer: str,
+                       rows: slice) -> np.ndarray:
+        items, lower_bars, lower_items = self._nesting_values(interval, layer, lower_interval, lower_layer)
+        starts, ends = (bounds[rows] for bounds in self._find_bounds(items, layer))
+        index, lower_index = self._bars(interval).index, lower_bars.index
 
-    def get_segment_pivots(self, interval: str) -> Optional[pd.DataFrame]:
-        pivot_df = self.segment_pivots[interval]
-        if pivot_df is None:
+        nestings = np.empty(len(starts), dtype=NESTING_DTYPE)
+        nestings['start'] = lower_index.searchsorted(index[starts], side='left')
+        following = lower_index.searchsorted(index[np.minimum(ends + 1, len(index) - 1)], side='left')
+        nestings['end'] = np.where(ends + 1 < len(index), following, len(lower_index))
+        if lower_items is None:
+            nestings['first'] = nestings['last'] = 0
+            return nestings
+
+        lower_starts, lower_ends = self._find_bounds(lower_items, lower_layer)
+        if lower_layer in ('strokes', 'segments'):
+            lower_starts = lower_ends = lower_items['position']
+        nestings['first'] = np.searchsorted(lower_starts, nestings['start'], side='left')
+        nestings['last'] = np.maximum(np.searchsorted(lower_ends, nestings['end'], side='left'), nestings['first'])
+        return nestings
+
+    @staticmethod
+    def _restore_revision(revision: Revision, start: int) -> np.ndarray:
+        lower = min(start, revision.start)
+        rows = np.concatenate([revision.items[lower:revision.start], *reversed(revision.saved)])
+        return rows[start - lower:]
+
+    @staticmethod
+    def _find_bounds(items: np.ndarray, layer: str) -> Tuple[np.ndarray, np.ndarray]:
+        positions = items['position']
+        if layer in ('strokes', 'segments'):
+            return positions[:-1], positions[1:]
+        return positions[::2], positions[1::2]
+
+    def _compute_memberships(self, interval: str) -> Optional[np.ndarray]:
+        bars = self._bars(interval)
+        if bars is None or bars.empty:
             return None
 
-        return self._format_pivots(pivot_df)
+        layers = {layer: getattr(self, layer)[interval] for layer in MEMBERSHIP_LAYERS}
+        start = len(bars)
+        for layer, items in layers.items():
+            size = 0 if items is None else len(items)
+            changed = self._take_changed(interval, layer, 'memberships', size)
+            start = min(start, 0 if changed == 0 else int(items['position'][changed - 1]))
+
+        stale = self.memberships.stale(interval)
+        start = 0 if stale is None else min(start, len(stale))
+        positions = np.arange(start, len(bars))
+        memberships = np.empty(len(positions), dtype=MEMBERSHIP_DTYPE)
+        for layer, items in layers.items():
+            if items is None:
+                memberships[layer[:-1]] = -1
+            elif layer == 'sticks':
+                memberships[layer[:-1]] = self._find_sticks(items, positions)
+            elif layer.endswith('pivots'):
+                memberships[layer[:-1]] = self._find_pairs(items, positions)
+            else:
+                memberships[layer[:-1]] = self._find_lines(items, positions)
+        return self._splice(interval, 'memberships', start, memberships)
+
+    @staticmethod
+    def _find_sticks(sticks: np.ndarray, positions: np.ndarray) -> np.ndarray:
+        return np.searchsorted(sticks['start'], positions, side='right') - 1
+
+    @staticmethod
+    def _find_lines(items: np.ndarray, positions: np.ndarray) -> np.ndarray:
+        points = items['position']
+        if len(points) < 2:
+            return np.full(len(positions), -1)
+
+        lines = np.searchsorted(points, positions, side='right') - 1
+        lines[positions == points[-1]] = len(points) - 2
+        lines[lines == len(points) - 1] = -1
+        return lines
+
+    @staticmethod
+    def _find_pairs(items: np.ndarray, positions: np.ndarray) -> np.ndarray:
+        entries, exits = items['position'][::2], items['position'][1::2]
+        if len(exits) == 0:
+            return np.full(len(positions), -1)
+
+        pairs = np.searchsorted(entries, positions, side='right') - 1
+        return np.where((pairs >= 0) & (positions <= exits[np.maximum(pairs, 0)]), pairs, -1)
 
-    def get_segment_pivot_trends(self, interval: str) -> Optional[pd.DataFrame]:
-        pivot_df = self.segment_pivots[interval]
-        if pivot_df is None:
+    def _get_frame(self, interval: str, name: str, value: Any, format_value: Callable[..., pd.DataFrame],
+                   start: Optional[TimeLike], end: Optional[TimeLike], last_n: Optional[int]) -> Optional[pd.DataFrame]:
+        if value is None:
             return None
 
-        return self._format_trends(pivot_df[1:-1])
+        window = self._find_window(interval, start, end, last_n)
+        if window is not None:
+            return format_value(interval, value, window)
 
-    def get_segment_pivot_signals(self, interval: str) -> Optional[pd.DataFrame]:
-        signal_df = self.segment_signals[interval]
-        if signal_df is None:
+        frames = self._frames.setdefault(interval, {})
+        cached = frames.get(name)
+        if cached is None or cached[0] is not value:
+            cached = frames[name] = (value, format_value(interval, value, None))
+        return cached[1].copy(deep=False)
+
+    def _find_window(self, interval: str, start: Optional[TimeLike], end: Optional[TimeLike],
+                     last_n: Optional[int]) -> Optional[Tuple[int, int]]:
+        if start is None and end is None and last_n is None:
             return None
+        if start is not None and last_n is not None:
+            raise ValueError("Use either start or last_n, not both")
+        if last_n is not None and last_n < 0:
+            raise ValueError(f"last_n must not be negative, got {last_n}")
+
+        index = self._bars(interval).index
+        lower = 0 if start is None else int(index.searchsorted(self.to_timestamp(start, index.tz), side='left'))
+        upper = len(index) if end is None else int(index.searchsorted(self.to_timestamp(end, index.tz), side='right'))
+        if last_n is not None:
+            lower = max(upper - last_n, 0)
+        return lower, max(lower, upper)
+
+    @staticmethod
+    def _slice_points(items: np.ndarray, window: Optional[Tuple[int, int]], margin: int = 0) -> np.ndarray:
+        if window is None:
+            return items
 
-        return self._format_signals(signal_df, 'segment')
+        first, last = np.searchsorted(items['position'], window, side='left')
+        return items[max(first - margin, 0):last + margin]
 
     @staticmethod
-    def _format_pivots(df: pd.DataFrame) -> pd.DataFrame:
-        df = pd.DataFrame({
-            'datetime': df.index.values[::2],
-            'end': df.index.values[1::2],
-            'entry_high': df['high'].values[::2],
-            'exit_high': df['high'].values[1::2],
-            'entry_low': df['low'].values[::2],
-            'exit_low': df['low'].values[1::2],
-            'level': df['level'].values[::2],
-            'status': df['status'].values[::2]
-        })
-        df['high'] = df['entry_high'].fillna(df['exit_high'])
-        df['low'] = df['entry_low'].fillna(df['exit_low'])
-        df.set_index('datetime', inplace=True)
-        return df[['end', 'high', 'low', 'level', 'status']]
+    def _slice_pairs(items: np.ndarray, window: Optional[Tuple[int, int]]) -> np.ndarray:
+        if window is None:
+            return items
+
+        first = np.searchsorted(items['position'][1::2], window[0], side='left')
+        last = np.searchsorted(items['position'][::2], window[1], side='left')
+        return items[2 * first:2 * max(first, last)]
+
+    def _format_sources(self, interval: str, source_df: pd.DataFrame,
+                        window: Optional[Tuple[int, int]]) -> pd.DataFrame:
+        lower, upper = (0, len(source_df)) if window is None else window
+        columns = {column: source_df[column].to_numpy()[lower:upper] for column in source_df.columns}
+        indicators = self._get_indicators(interval, [
+            column for indicator in self.indicators for column in indicator.columns
+        ])
+        columns.update((column, values[lower:upper]) for column, values in indicators.items())
+        return self._to_frame(columns, source_df.index[lower:upper])
+
+    def _format_sticks(self, interval: str, sticks: np.ndarray, window: Optional[Tuple[int, int]]) -> pd.DataFrame:
+        index = self._bars(interval).index
+        lower, upper = (0, len(index)) if window is None else window
+        sticks = self._slice_points(sticks, window)
+        columns = {column: np.full(upper - lower, np.nan) for column in ('high', 'low')}
+        for column, values in columns.items():
+            values[sticks['position'] - lower] = sticks[column]
+        return self._to_frame(columns, index[lower:upper])
+
+    def _format_fractals(self, interval: str, fractals: np.ndarray,
+                         window: Optional[Tuple[int, int]]) -> pd.DataFrame:
+        fractals = self._slice_points(fractals, window)
+        fractals = fractals[~np.isnan(fractals['high']) | ~np.isnan(fractals['low'])]
+        return self._to_frame({'high': fractals['high'], 'low': fractals['low']}, self._to_index(interval, fractals))
+
+    def _format_lines(self, interval: str, items: np.ndarray, window: Optional[Tuple[int, int]],
+                      name: str) -> pd.DataFrame:
+        items = self._slice_points(items, window, 1)
+        return self._to_frame({name: self._fill(items['high'], items['low'])}, self._to_index(interval, items))
+
+    def _format_pivots(self, interval: str, pivots: np.ndarray, window: Optional[Tuple[int, int]]) -> pd.DataFrame:
+        pivots = self._slice_pairs(pivots, window)
+        index = self._to_index(interval, pivots).values
+        entries, exits = pivots[::2], pivots[1::2]
+        return self._to_frame({
+            'end': index[1::2],
+            'high': self._fill(entries['high'], exits['high']),
+            'low': self._fill(entries['low'], exits['low']),
+            'level': entries['level'].copy(),
+            'status': entries['status'].copy()
+        }, pd.DatetimeIndex(index[::2], name='datetime'))
+
+    def _format_trends(self, interval: str, pivots: np.ndarray, window: Optional[Tuple[int, int]]) -> pd.DataFrame:
+        pivots = self._slice_pairs(pivots[1:-1], window)
+        index = self._to_index(interval, pivots).values
+        return self._to_frame({
+            'end': index[1::2],
+            'open': pivots['price'][::2].copy(),
+            'close': pivots['price'][1::2].copy()
+        }, pd.DatetimeIndex(index[::2], name='datetime'))
+
+    def _format_memberships(self, interval: str, memberships: np.ndarray,
+                            window: Optional[Tuple[int, int]]) -> pd.DataFrame:
+        index = self._bars(interval).index
+        lower, upper = (0, len(index)) if window is None else window
+        return self._to_frame({
+            name: memberships[name][lower:upper].copy() for name in MEMBERSHIP_DTYPE.names
+        }, index[lower:upper])
+
+    def _format_signals(self, interval: str, signals: np.ndarray, window: Optional[Tuple[int, int]],
+                        name: str) -> pd.DataFrame:
+        signals = self._slice_points(signals, window)
+        return self._to_frame({
+            name: self._fill(signals['high'], signals['low']),
+            'signal': signals['signal'].copy()
+        }, self._to_index(interval, signals))
+
+    def _to_index(self, interval: str, items: np.ndarray) -> pd.DatetimeIndex:
+        return self._bars(interval).index[items['position']]
 
     @staticmethod
-    def _format_trends(df: pd.DataFrame) -> pd.DataFrame:
-        df = pd.DataFrame({
-            'datetime': df.index.values[::2],
-            'end': df.index.values[1::2],
-            'open': df['price'].values[::2],
-            'close': df['price'].values[1::2]
-        })
-        df.set_index('datetime', inplace=True)
-        return df[['end', 'open', 'close']]
+    def _fill(values: np.ndarray, fallback: np.ndarray) -> np.ndarray:
+        return np.where(np.isnan(values), fallback, values)
 
     @staticmethod
-    def _format_signals(df: pd.DataFrame, name: str) -> pd.DataFrame:
-        df = pd.DataFrame(df)
-        df[name] = df['high'].fillna(df['low'])
-        return df[[name, 'signal']]
+    def _to_frame(columns: Dict[str, np.ndarray], index: pd.Index) -> pd.DataFrame:
+        for column, values in columns.items():
+            columns[column] = values = values.view(np.ndarray)
+            values.flags.writeable = False
+        return pd.DataFrame(columns, index=index, copy=False)
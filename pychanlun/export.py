@@ -0,0 +1,203 @@
+import json
+import os
+import zlib
+from concurrent.futures import Executor
+from typing import Dict, Optional, List, Tuple, Any, Callable, Iterable, Mapping, Sequence, Set, Union
+
+import numpy as np
+import pandas as pd
+
+from pychanlun.chan import Chan
+from pychanlun.universe import COLUMNS, ChanUniverse, Layout, _attach_sources
+
+LAYERS = (
+    'sources', 'sticks', 'fractals', 'strokes', 'stroke_pivots', 'stroke_pivot_trends', 'stroke_pivot_signals',
+    'segments', 'segment_pivots', 'segment_pivot_trends', 'segment_pivot_signals'
+)
+FORMATS = {'parquet': 'parquet', 'arrow': 'arrow'}
+COMPACT_DTYPES = {'signal': np.int8, 'status': np.int8, 'level': np.int32}
+METADATA = '_export.json'
+
+Tables = Dict[Tuple[str, str], Any]
+
+
+class ChanExport(ChanUniverse):
+
+    def __init__(self, sources: Union[Mapping[str, Dict[str, pd.DataFrame]], Callable[[str], Dict[str, pd.DataFrame]]],
+                 directory: str, symbols: Optional[Iterable[str]] = None, layers: Sequence[str] = LAYERS,
+                 buckets: int = 16, file_format: str = 'parquet', executor: Optional[Executor] = None,
+                 max_workers: Optional[int] = None, progress: Optional[Callable[[int, int, str], None]] = None):
+        if file_format not in FORMATS:
+            raise ValueError(f"File format must be one of {tuple(FORMATS)}, got {file_format}")
+        unknown = [layer for layer in layers if layer not in LAYERS]
+        if unknown:
+            raise ValueError(f"Unknown layers: {unknown}")
+
+        super().__init__(sources, symbols, layers, executor, max_workers, progress)
+        self.directory = directory
+        self.buckets = buckets
+        self.file_format = file_format
+        self.files: List[str] = []
+        self._writers: Dict[int, Dict[Tuple[str, str], Tuple[str, Any, Any]]] = {}
+        self._remaining: Dict[int, int] = {}
+        self._active: Set[int] = set()
+
+    def run(self) -> List[str]:
+        _import_arrow()
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, METADATA), 'w') as f:
+            json.dump({'buckets': self.buckets, 'file_format': self.file_format}, f)
+
+        symbols = sorted(self.symbols, key=lambda symbol: _find_bucket(symbol, self.buckets))
+        self.files, self._writers, self._remaining, self._active = [], {}, {}, set()
+        for symbol in symbols:
+            bucket = _find_bucket(symbol, self.buckets)
+            self._remaining[bucket] = self._remaining.get(bucket, 0) + 1
+
+        try:
+            self._execute(symbols)
+        finally:
+            for bucket in list(self._writers):
+                self._close_bucket(bucket)
+        return self.files
+
+    @staticmethod
+    def load(directory: str, interval: str, layer: str,
+             symbols: Optional[Iterable[str]] = None) -> Optional[pd.DataFrame]:
+        pa = _import_arrow()
+        with open(os.path.join(directory, METADATA)) as f:
+            metadata = json.load(f)
+
+        path = os.path.join(directory, f'interval={interval}', f'layer={layer}')
+        if not os.path.isdir(path):
+            return None
+
+        extension = FORMATS[metadata['file_format']]
+        names = sorted(name for name in os.listdir(path) if name.endswith(f'.{extension}'))
+        if symbols is not None:
+            symbols = list(symbols)
+            selected = {f'bucket={_find_bucket(symbol, metadata["buckets"]):05d}.{extension}' for symbol in symbols}
+            names = [name for name in names if name in selected]
+
+        tables = [_read_table(os.path.join(path, name), metadata['file_format'], symbols) for name in names]
+        tables = [table for table in tables if table.num_rows > 0]
+        if not tables:
+            return None
+
+        frame = pa.concat_tables(tables, promote_options='permissive').to_pandas(strings_to_categorical=True)
+        return frame.set_index('datetime')
+
+    def _admit(self, symbol: str, workers: int) -> bool:
+        bucket = _find_bucket(symbol, self.buckets)
+        if bucket not in self._active:
+            if len(self._active) >= workers:
+                return False
+            self._active.add(bucket)
+        return True
+
+    def _task(self, symbol: str, shared: Optional[Tuple[str, Layout]]) -> Tuple[Any, ...]:
+        return _export_symbol, symbol, self._loader, shared, self.layers
+
+    def _collect(self, symbol: str, result: Tables) -> None:
+        writers = self._writers.setdefault(_find_bucket(symbol, self.buckets), {})
+        try:
+            tables = {key: table.cast(writers[key][2]) if key in writers else table for key, table in result.items()}
+            for (interval, layer), table in tables.items():
+                if (interval, layer) not in writers:
+                    writers[(interval, layer)] = self._open_writer(symbol, interval, layer, table.schema)
+                writers[(interval, layer)][1].write_table(table)
+        except Exception as e:
+            self._fail(symbol, e)
+            return
+        self._report(symbol)
+
+    def _report(self, symbol: str) -> None:
+        bucket = _find_bucket(symbol, self.buckets)
+        self._remaining[bucket] -= 1
+        if not self._remaining[bucket]:
+            self._active.discard(bucket)
+            self._close_bucket(bucket)
+        super()._report(symbol)
+
+    def _open_writer(self, symbol: str, interval: str, layer: str, schema: Any) -> Tuple[str, Any, Any]:
+        pa = _import_arrow()
+        path = os.path.join(self.directory, f'interval={interval}', f'layer={layer}',
+                            f'bucket={_find_bucket(symbol, self.buckets):05d}.{FORMATS[self.file_format]}')
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if self.file_format == 'parquet':
+            import pyarrow.parquet as pq
+            return path, pq.ParquetWriter(f'{path}.tmp', schema, compression='zstd'), schema
+
+        options = pa.ipc.IpcWriteOptions(compression='zstd')
+        return path, pa.ipc.new_file(f'{path}.tmp', schema, options=options), schema
+
+    def _close_bucket(self, bucket: int) -> None:
+        for path, writer, _ in self._writers.pop(bucket, {}).values():
+            writer.close()
+            os.replace(f'{path}.tmp', path)
+            self.files.append(path)
+
+
+def _import_arrow() -> Any:
+    try:
+        import pyarrow as pa
+    except ImportError as e:
+        raise ImportError("Exporting layers requires pyarrow") from e
+    return pa
+
+
+def _find_bucket(symbol: str, buckets: int) -> int:
+    return zlib.crc32(symbol.encode()) % buckets
+
+
+def _export_symbol(symbol: str, loader: Optional[Callable[[str], Dict[str, pd.DataFrame]]],
+                   shared: Optional[Tuple[str, Layout]], layers: Sequence[str]) -> Tables:
+    sources = loader(symbol) if loader is not None else _attach_sources(*shared)
+    chan = Chan(symbol, sources)
+    columns = list(COLUMNS) + [column for indicator in chan.indicators for column in indicator.columns]
+
+    tables = {}
+    for interval in sources.keys():
+        for layer in layers:
+            df = getattr(chan, f'get_{layer}')(interval)
+            if layer == 'sources' and df is not None:
+                df = df[columns].astype(np.float64)
+            table = _to_table(symbol, df, layer)
+            if table is not None:
+                tables[(interval, layer)] = table
+    return tables
+
+
+def _to_table(symbol: str, df: Optional[pd.DataFrame], layer: str) -> Any:
+    pa = _import_arrow()
+    if df is None or df.empty:
+        return None
+    if layer == 'sticks':
+        df = df[~(df['high'].isna() & df['low'].isna())]
+
+    index = df.index if df.index.tz is None else df.index.tz_convert(None)
+    columns = {'symbol': pa.array(np.full(len(df), symbol)), 'datetime': pa.array(index.to_numpy().astype('M8[ns]'))}
+    for column in df.columns:
+        values = df[column].to_numpy()
+        if column in COMPACT_DTYPES and values.dtype.kind in 'iu':
+            values = values.astype(COMPACT_DTYPES[column])
+        elif getattr(df[column].dtype, 'tz', None) is not None:
+            values = df[column].dt.tz_convert(None).to_numpy().astype('M8[ns]')
+        elif values.dtype.kind == 'M':
+            values = values.astype('M8[ns]')
+        columns[str(column)] = pa.array(values)
+    return pa.table(columns)
+
+
+def _read_table(path: str, file_format: str, symbols: Optional[List[str]]) -> Any:
+    pa = _import_arrow()
+    if file_format == 'parquet':
+        import pyarrow.parquet as pq
+        return pq.read_table(path, filters=None if symbols is None else [('symbol', 'in', symbols)])
+
+    table = pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+    if symbols is None:
+        return table
+
+    import pyarrow.compute as pc
+    return table.filter(pc.is_in(table['symbol'], value_set=pa.array(symbols)))
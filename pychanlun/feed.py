@@ -0,0 +1,105 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Optional, List, Tuple, AsyncIterable, Mapping, Sequence
+
+import pandas as pd
+
+from pychanlun.chan import Chan, CHANGE_LAYERS
+from pychanlun.indicator import Indicator
+
+CONSUMER = 'feed'
+
+
+@dataclass(frozen=True)
+class FeedEvent:
+    symbol: str
+    interval: str
+    layer: str
+    row: int
+    frame: pd.DataFrame
+
+
+class ChanFeed:
+
+    def __init__(self, sources: Optional[Mapping[str, Dict[str, pd.DataFrame]]] = None,
+                 executor: Optional[ThreadPoolExecutor] = None, layers: Sequence[str] = tuple(CHANGE_LAYERS),
+                 max_batch: int = 256, max_pending: int = 64, max_events: int = 0, inplace: bool = True,
+                 indicators: Optional[Sequence[Indicator]] = None):
+        unknown = [layer for layer in layers if layer not in CHANGE_LAYERS]
+        if unknown:
+            raise ValueError(f"Unknown layers: {unknown}")
+        if executor is not None and not isinstance(executor, ThreadPoolExecutor):
+            raise ValueError(f"Executor must be a ThreadPoolExecutor, got {type(executor).__name__}")
+
+        self.chans: Dict[str, Chan] = {}
+        self.events: asyncio.Queue = asyncio.Queue(max_events)
+        self.errors: Dict[str, Exception] = {}
+        self.layers = tuple(layers)
+        self._sources = {} if sources is None else sources
+        self._executor = executor
+        self._max_batch = max_batch
+        self._max_pending = max_pending
+        self._inplace = inplace
+        self._indicators = indicators
+
+    async def run(self, feeds: Mapping[Tuple[str, str], AsyncIterable[pd.DataFrame]]) -> None:
+        queues: Dict[str, asyncio.Queue] = {}
+        for symbol, _ in feeds.keys():
+            queues.setdefault(symbol, asyncio.Queue(self._max_pending))
+
+        workers = [asyncio.create_task(self._analyze(symbol, queue)) for symbol, queue in queues.items()]
+        try:
+            await asyncio.gather(*(
+                self._read(symbol, interval, bars, queues[symbol]) for (symbol, interval), bars in feeds.items()
+            ))
+            for queue in queues.values():
+                await queue.put(None)
+            await asyncio.gather(*workers)
+        finally:
+            for worker in workers:
+                worker.cancel()
+
+    async def _read(self, symbol: str, interval: str, feed: AsyncIterable[pd.DataFrame], queue: asyncio.Queue) -> None:
+        try:
+            async for bars in feed:
+                await queue.put((interval, bars))
+        except Exception as e:
+            self.errors.setdefault(symbol, e)
+
+    async def _analyze(self, symbol: str, queue: asyncio.Queue) -> None:
+        loop = asyncio.get_running_loop()
+        finished = False
+        while not finished:
+            batch = [await queue.get()]
+            while len(batch) < self._max_batch and not queue.empty():
+                batch.append(queue.get_nowait())
+            finished = batch[-1] is None
+            batch = [item for item in batch if item is not None]
+            if not batch or symbol in self.errors:
+                continue
+
+            try:
+                events = await loop.run_in_executor(self._executor, self._apply, symbol, batch)
+            except Exception as e:
+                self.errors[symbol] = e
+                continue
+            for event in events:
+                await self.events.put(event)
+
+    def _apply(self, symbol: str, batch: List[Tuple[str, pd.DataFrame]]) -> List[FeedEvent]:
+        chan = self.chans.get(symbol)
+        if chan is None:
+            chan = self.chans[symbol] = Chan(symbol, dict(self._sources.get(symbol, {})),
+                                             inplace=self._inplace, indicators=self._indicators)
+
+        frames: Dict[str, List[pd.DataFrame]] = {}
+        for interval, bars in batch:
+            frames.setdefault(interval, []).append(bars)
+
+        events = []
+        for interval, bars in frames.items():
+            chan.update(interval, bars[0] if len(bars) == 1 else pd.concat(bars))
+            for layer, (row, frame) in chan.get_changes(interval, CONSUMER, self.layers).items():
+                events.append(FeedEvent(symbol, interval, layer, row, frame))
+        return events
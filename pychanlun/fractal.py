@@ -1,55 +1,67 @@
-from typing import Dict, Optional, List, Tuple
+from concurrent.futures import Executor
+from typing import Dict, Optional, Sequence
 
 import numpy as np
 import pandas as pd
+from pychanlun.cache import LayerCache
+from pychanlun.indicator import Indicator
 from pychanlun.stick import Stick
+from pychanlun.stock import Layer, ITEM_DTYPE
 
 
 class Fractal(Stick):
 
-    def __init__(self, symbol: str, source: Dict[str, pd.DataFrame]):
-        self.fractals: Dict[str, Optional[pd.DataFrame]] = {}
-        super().__init__(symbol, source)
+    def __init__(self, symbol: str, source: Dict[str, pd.DataFrame], executor: Optional[Executor] = None,
+                 cache: Optional[LayerCache] = None, inplace: bool = True,
+                 indicators: Optional[Sequence[Indicator]] = None):
+        self.fractals: Dict[str, Optional[np.ndarray]] = Layer(self._compute_fractals, 'sticks')
+        super().__init__(symbol, source, executor, cache, inplace, indicators)
 
     def _process_interval(self, interval: str) -> None:
         super()._process_interval(interval)
+        self.fractals[interval]
 
-        stick_df = self.sticks[interval]
-        if stick_df is None or stick_df.empty:
-            self.fractals[interval] = None
-            return
+    def _invalidate_interval(self, interval: str) -> None:
+        super()._invalidate_interval(interval)
+        self.fractals.invalidate(interval)
 
-        sticks = list(stick_df.itertuples())
+    def _compute_fractals(self, interval: str) -> Optional[np.ndarray]:
+        sticks = self.sticks[interval]
+        if sticks is None or len(sticks) == 0:
+            self._mark_changed(interval, 'fractals', 0)
+            return None
 
-        fractal_df = self._scan_for_fractals(sticks)
-        self.fractals[interval] = fractal_df
+        fractals = self.fractals.stale(interval)
+        changed = self._take_changed(interval, 'sticks', 'fractals', len(sticks))
+        changed = max(changed - 2, 0) if fractals is not None else 0
 
-    def _scan_for_fractals(self, sticks: List) -> Optional[pd.DataFrame]:
-        rows = []
+        self._mark_changed(interval, 'fractals', changed)
+        return self._splice(interval, 'fractals', changed, self._scan_for_fractals(sticks[changed:]))
 
-        for index in range(1, len(sticks)):
-            prev_stick, curr_stick = sticks[index - 1], sticks[index]
-            next_stick = sticks[index + 1] if index < len(sticks) - 1 else None
-            rows.append(self._classify_fractal(prev_stick, curr_stick, next_stick))
+    def _scan_for_fractals(self, sticks: np.ndarray) -> Optional[np.ndarray]:
+        if len(sticks) < 2:
+            return None
 
-        return self.to_dataframe(rows, ['high', 'low'])
+        highs = sticks['high']
+        lows = sticks['low']
 
-    def _classify_fractal(self, prev_stick: Tuple, curr_stick: Tuple, next_stick: Tuple) -> Tuple:
-        if self._is_top_fractal(prev_stick, curr_stick, next_stick):
-            return curr_stick._replace(low=np.nan)
-        elif self._is_bottom_fractal(prev_stick, curr_stick, next_stick):
-            return curr_stick._replace(high=np.nan)
-        else:
-            return curr_stick._replace(high=np.nan, low=np.nan)
+        is_top = self._is_top_fractal(highs)
+        is_bottom = self._is_bottom_fractal(lows) & ~is_top
+
+        fractals = np.empty(len(sticks) - 1, dtype=ITEM_DTYPE)
+        fractals['position'] = sticks['position'][1:]
+        fractals['high'] = np.where(is_top, highs[1:], np.nan)
+        fractals['low'] = np.where(is_bottom, lows[1:], np.nan)
+        return fractals
 
     @staticmethod
-    def _is_top_fractal(prev_stick: Tuple, curr_stick: Tuple, next_stick: Tuple) -> bool:
-        prev_is_low = prev_stick is None or curr_stick.high > prev_stick.high
-        next_is_low = next_stick is None or curr_stick.high > next_stick.high
-        return prev_is_low and next_is_low
+    def _is_top_fractal(highs: np.ndarray) -> np.ndarray:
+        prev_is_low = highs[1:] > highs[:-1]
+        next_is_low = np.append(highs[1:-1] > highs[2:], True)
+        return prev_is_low & next_is_low
 
     @staticmethod
-    def _is_bottom_fractal(prev_stick: Tuple, curr_stick: Tuple, next_stick: Tuple) -> bool:
-        prev_is_high = prev_stick is None or curr_stick.low < prev_stick.low
-        next_is_high = next_stick is None or curr_stick.low < next_stick.low
-        return prev_is_high and next_is_high
+    def _is_bottom_fractal(lows: np.ndarray) -> np.ndarray:
+        prev_is_high = lows[1:] < lows[:-1]
+        next_is_high = np.append(lows[1:-1] < lows[2:], True)
+        return prev_is_high & next_is_high
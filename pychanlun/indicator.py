@@ -0,0 +1,106 @@
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple, Iterable, Union
+
+import numpy as np
+
+BLOCK_SIZE = 1024
+
+
+@dataclass(frozen=True)
+class MovingAverage:
+    window: int
+
+    @property
+    def columns(self) -> Tuple[str, ...]:
+        return (f'ma{self.window}',)
+
+
+@dataclass(frozen=True)
+class Macd:
+    fast: int = 12
+    slow: int = 26
+    signal: int = 9
+
+    @property
+    def columns(self) -> Tuple[str, ...]:
+        return ('macd', 'macd_dea', 'macd_dif')
+
+
+@dataclass(frozen=True)
+class BollingerBands:
+    period: int = 20
+    k: float = 2
+
+    @property
+    def columns(self) -> Tuple[str, ...]:
+        return ('bb', 'bb_upper', 'bb_lower')
+
+
+Indicator = Union[MovingAverage, Macd, BollingerBands]
+
+
+def rolling_moments(values: np.ndarray, windows: Iterable[int],
+                    deviations: Iterable[int] = ()) -> Dict[int, Tuple[np.ndarray, Optional[np.ndarray]]]:
+    deviations = set(deviations)
+    windows = sorted(set(windows) | deviations)
+    if not windows:
+        return {}
+    if windows[0] < 1:
+        raise ValueError(f"Windows must be positive, got {windows[0]}")
+
+    size = len(values)
+    block = max(BLOCK_SIZE, windows[-1])
+    count = -(-size // block)
+    missing = np.isnan(values)
+    nans = np.concatenate(([0], np.cumsum(missing)))
+
+    padded = np.full(count * block, np.nan)
+    padded[:size] = values
+    padded = padded.reshape(count, block)
+    shifts = np.nan_to_num(padded[np.arange(count), np.argmax(~np.isnan(padded), axis=1)], nan=0.0)
+    centered = np.nan_to_num(padded - shifts[:, None], nan=0.0)
+
+    def spread(per_block: np.ndarray) -> np.ndarray:
+        return np.repeat(per_block, block)[:size]
+
+    def prefix(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        inclusive = np.cumsum(values, axis=1)
+        exclusive = inclusive - values
+        wrapped = exclusive - inclusive[:, -1:]
+        return inclusive.ravel()[:size], exclusive.ravel()[:size], wrapped.ravel()[:size]
+
+    offsets = np.tile(np.arange(block), count)[:size]
+    shift = spread(shifts)
+    shift_change = spread(np.concatenate(([0.0], shifts[:-1]))) - shift
+    sums = prefix(centered)
+    squares = prefix(centered * centered) if deviations else None
+
+    moments = {}
+    for window in windows:
+        ends, starts = slice(window - 1, size), slice(0, max(size - window + 1, 0))
+        length = np.maximum(window - 1 - offsets[ends], 0)
+        spans = length > 0
+        change = shift_change[ends]
+
+        heads = np.where(spans, sums[2][starts], sums[1][starts])
+        total = sums[0][ends] - heads + length * change
+        invalid = nans[window:] - nans[starts] > 0 if nans[-1] else None
+
+        mean = np.full(size, np.nan)
+        mean[ends] = shift[ends] + total / window
+        if invalid is not None:
+            mean[ends][invalid] = np.nan
+
+        std = None
+        if window in deviations:
+            std = np.full(size, np.nan)
+            if window > 1:
+                outer = np.where(spans, -heads, 0.0)
+                total_squares = (squares[0][ends] - np.where(spans, squares[2][starts], squares[1][starts]) +
+                                 change * (2 * outer + length * change))
+                std[ends] = np.sqrt(np.maximum(total_squares - total * total / window, 0.0) / (window - 1))
+                if invalid is not None:
+                    std[ends][invalid] = np.nan
+
+        moments[window] = mean, std
+    return moments
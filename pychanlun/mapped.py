@@ -0,0 +1,101 @@
+import os
+from typing import Dict, Optional, List, Any, Union
+
+import numpy as np
+import pandas as pd
+
+COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+
+
+class MappedSource:
+
+    def __init__(self, timestamps: np.ndarray, columns: Dict[str, np.ndarray], tz: Optional[str] = None):
+        columns = {name.lower(): values for name, values in columns.items()}
+        missing = [column for column in COLUMNS if column not in columns]
+        if missing:
+            raise ValueError(f"Missing required columns: {missing}")
+
+        timestamps = np.asarray(timestamps)
+        if timestamps.dtype == np.int64:
+            timestamps = timestamps.view('datetime64[ns]')
+        if timestamps.dtype.kind != 'M':
+            raise ValueError(f"Timestamps must be datetime64 or int64 nanoseconds, got {timestamps.dtype}")
+        for name, values in columns.items():
+            if len(values) != len(timestamps):
+                raise ValueError(f"Column {name} has {len(values)} rows, expected {len(timestamps)}")
+
+        self.timestamps = timestamps
+        self.tz = tz
+        self._columns = {name: columns[name] for name in COLUMNS}
+        self._columns.update(columns)
+        self._index: Optional[pd.DatetimeIndex] = None
+        self._reopen: Optional[tuple] = None
+
+    @classmethod
+    def from_npy(cls, paths: Union[str, Dict[str, str]], tz: Optional[str] = None,
+                 timestamp: str = 'datetime') -> 'MappedSource':
+        if isinstance(paths, str):
+            paths = {
+                name[:-4]: os.path.join(paths, name) for name in sorted(os.listdir(paths)) if name.endswith('.npy')
+            }
+
+        arrays = {name: np.load(path, mmap_mode='r') for name, path in paths.items()}
+        if timestamp not in arrays:
+            raise ValueError(f"Missing timestamp column: {timestamp}")
+
+        source = cls(arrays.pop(timestamp), arrays, tz)
+        source._reopen = (cls.from_npy, (dict(paths), tz, timestamp))
+        return source
+
+    @classmethod
+    def from_arrow(cls, path: str, tz: Optional[str] = None, timestamp: str = 'datetime') -> 'MappedSource':
+        try:
+            import pyarrow as pa
+        except ImportError as e:
+            raise ImportError("Reading Arrow IPC files requires pyarrow") from e
+
+        table = pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+        if timestamp not in table.column_names:
+            raise ValueError(f"Missing timestamp column: {timestamp}")
+
+        arrays = {}
+        for name in table.column_names:
+            column = table.column(name)
+            if column.num_chunks == 1:
+                arrays[name] = column.chunk(0).to_numpy(zero_copy_only=False)
+            else:
+                arrays[name] = column.to_numpy()
+
+        source = cls(arrays.pop(timestamp), arrays, tz)
+        source._reopen = (cls.from_arrow, (path, tz, timestamp))
+        return source
+
+    def __reduce__(self) -> Any:
+        if self._reopen is not None:
+            return self._reopen
+        return MappedSource, (self.timestamps, self._columns, self.tz)
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self._columns[name]
+
+    @property
+    def empty(self) -> bool:
+        return len(self.timestamps) == 0
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self._columns.keys())
+
+    @property
+    def index(self) -> pd.DatetimeIndex:
+        if self._index is None:
+            index = pd.DatetimeIndex(self.timestamps, name='datetime')
+            self._index = index if self.tz is None else index.tz_localize('UTC').tz_convert(self.tz)
+        return self._index
+
+    def to_frame(self, start: int = 0) -> pd.DataFrame:
+        return pd.DataFrame({name: np.array(values[start:]) for name, values in self._columns.items()},
+                            index=self.index[start:])
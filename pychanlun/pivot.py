@@ -1,8 +1,22 @@
-from dataclasses import dataclass
-from typing import Dict, Optional, Any, List, Tuple
+from collections import namedtuple
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Any, List, Tuple, Sequence
 
+import numpy as np
 import pandas as pd
+from pychanlun.cache import LayerCache
+from pychanlun.indicator import Indicator, Macd
 from pychanlun.segment import Segment
+from pychanlun.stock import Checkpoint, Layer
+
+
+PIVOT_DTYPE = np.dtype([
+    ('position', np.int64), ('high', np.float64), ('low', np.float64),
+    ('price', np.float64), ('macd', np.float64), ('level', np.int64), ('status', np.int64)
+])
+
+PivotRow = namedtuple('PivotRow', ['position', 'high', 'low', 'price', 'macd', 'level', 'status'])
 
 
 @dataclass
@@ -13,52 +27,150 @@ class Range:
     low: float
 
 
-class Pivot(Segment):
-
-    def __init__(self, symbol: str, source: Dict[str, pd.DataFrame]):
-        self.stroke_pivots: Dict[str, Optional[pd.DataFrame]] = {}
-        self.segment_pivots: Dict[str, Optional[pd.DataFrame]] = {}
-        super().__init__(symbol, source)
-
-    def _process_interval(self, interval: str) -> None:
-        super()._process_interval(interval)
-
-        source_df = self.sources[interval]
-        stroke_df = self.strokes[interval]
-        if source_df is not None and stroke_df is not None:
-            stroke_pivot_df = self._identify_pivots(stroke_df, source_df)
-            self.stroke_pivots[interval] = stroke_pivot_df
-        else:
-            self.stroke_pivots[interval] = None
-
-        segment_df = self.segments[interval]
-        if source_df is not None and segment_df is not None:
-            segment_pivot_df = self._identify_pivots(segment_df, source_df)
-            self.segment_pivots[interval] = segment_pivot_df
-        else:
-            self.segment_pivots[interval] = None
+@dataclass
+class MacdArea:
+    size: int
+    total: np.ndarray
+    above: np.ndarray
+    below: np.ndarray
 
-    def _identify_pivots(self, segment_df: pd.DataFrame, source_df: pd.DataFrame) -> Optional[pd.DataFrame]:
-        segment_df = pd.DataFrame(segment_df)
-        segment_df['price'] = segment_df['macd'] = segment_df['level'] = segment_df['status'] = 0
 
-        segments = list(segment_df.itertuples())
+@dataclass
+class PivotState:
+    zones: List = field(default_factory=list)
+    checkpoints: List[Checkpoint] = field(default_factory=lambda: [Checkpoint(0, 0, -1)])
+    merged: List = field(default_factory=list)
+    boundaries: List[Checkpoint] = field(default_factory=lambda: [Checkpoint(0, 0, -1)])
+    rows: List = field(default_factory=list)
+    levels: List[int] = field(default_factory=list)
 
-        rows = self._process_pivots(segments)
-        self._merge_overlapping_pivots(rows)
 
-        self._set_pivot_metrics(rows, source_df)
-        return self.to_dataframe(rows, ['high', 'low', 'price', 'macd', 'level', 'status'])
+class Pivot(Segment):
+    STATE_TYPES = (*Segment.STATE_TYPES, MacdArea, PivotState, PivotRow)
+    REQUIRED_INDICATORS = (Macd,)
+
+    def __init__(self, symbol: str, source: Dict[str, pd.DataFrame], executor: Optional[Executor] = None,
+                 cache: Optional[LayerCache] = None, inplace: bool = True,
+                 indicators: Optional[Sequence[Indicator]] = None):
+        self.stroke_pivots: Dict[str, Optional[np.ndarray]] = Layer(self._compute_stroke_pivots, 'strokes')
+        self.segment_pivots: Dict[str, Optional[np.ndarray]] = Layer(self._compute_segment_pivots, 'segments')
+        self._macd_areas: Dict[str, MacdArea] = {}
+        self._stroke_pivot_states: Dict[str, PivotState] = {}
+        self._segment_pivot_states: Dict[str, PivotState] = {}
+        super().__init__(symbol, source, executor, cache, inplace, indicators)
 
-    def _process_pivots(self, segments: List) -> List:
+    def _process_interval(self, interval: str) -> None:
+        super()._process_interval(interval)
+        self.stroke_pivots[interval]
+        self.segment_pivots[interval]
+
+    def _invalidate_interval(self, interval: str) -> None:
+        super()._invalidate_interval(interval)
+        self.stroke_pivots.invalidate(interval)
+        self.segment_pivots.invalidate(interval)
+
+    def _compute_stroke_pivots(self, interval: str) -> Optional[np.ndarray]:
+        strokes = self.strokes[interval]
+        macd_area = self._get_macd_area(interval)
+        if macd_area is None or strokes is None:
+            self._stroke_pivot_states.pop(interval, None)
+            self._mark_changed(interval, 'stroke_pivots', 0)
+            return None
+
+        state = self._stroke_pivot_states.setdefault(interval, PivotState())
+        changed = self._take_changed(interval, 'strokes', 'stroke_pivots', len(strokes))
+        changed, stroke_pivots = self._identify_pivots(strokes, macd_area, state, changed)
+        self._mark_changed(interval, 'stroke_pivots', changed)
+        return self._splice(interval, 'stroke_pivots', changed, stroke_pivots)
+
+    def _compute_segment_pivots(self, interval: str) -> Optional[np.ndarray]:
+        segments = self.segments[interval]
+        macd_area = self._get_macd_area(interval)
+        if macd_area is None or segments is None:
+            self._segment_pivot_states.pop(interval, None)
+            self._mark_changed(interval, 'segment_pivots', 0)
+            return None
+
+        state = self._segment_pivot_states.setdefault(interval, PivotState())
+        changed = self._take_changed(interval, 'segments', 'segment_pivots', len(segments))
+        changed, segment_pivots = self._identify_pivots(segments, macd_area, state, changed)
+        self._mark_changed(interval, 'segment_pivots', changed)
+        return self._splice(interval, 'segment_pivots', changed, segment_pivots)
+
+    def _get_macd_area(self, interval: str) -> Optional[MacdArea]:
+        source_df = self.sources[interval]
+        macd_area = self._macd_areas.get(interval)
+        if source_df is None or source_df.empty:
+            self._macd_areas.pop(interval, None)
+            return None
+
+        if macd_area is None or macd_area.size != len(source_df):
+            macd = self._get_indicators(interval, ('macd', 'macd_dea', 'macd_dif'))
+            macd_area = self._macd_areas[interval] = self._index_macd_area(interval, *macd.values(), macd_area)
+        return macd_area
+
+    def _index_macd_area(self, interval: str, macd: np.ndarray, macd_dea: np.ndarray, macd_dif: np.ndarray,
+                         macd_area: Optional[MacdArea]) -> MacdArea:
+        size = 0 if macd_area is None else macd_area.size
+        length = len(macd)
+        macd, macd_dea = macd[size:], macd_dea[size:]
+        macd_dif = np.nan_to_num(macd_dif[size:], nan=0.0)
+
+        total, above, below = ((np.zeros(1),) * 3 if macd_area is None
+                               else (macd_area.total, macd_area.above, macd_area.below))
+
+        def cumulate(name: str, values: np.ndarray, areas: np.ndarray) -> np.ndarray:
+            tail = np.cumsum(np.concatenate((areas[-1:], values)))[1:]
+            return self._append((interval, 'macd_area', name), areas, len(areas), tail)
+
+        return MacdArea(
+            size=length,
+            total=cumulate('total', macd_dif, total),
+            above=cumulate('above', np.where(macd > macd_dea, macd_dif, 0.0), above),
+            below=cumulate('below', np.where(macd < macd_dea, macd_dif, 0.0), below)
+        )
+
+    def _identify_pivots(self, segments: np.ndarray, macd_area: MacdArea, state: PivotState,
+                         changed: int) -> Tuple[int, Optional[np.ndarray]]:
+        checkpoint = self._find_checkpoint(state.checkpoints, changed)
+
+        segments = [
+            PivotRow(position, high, low, 0, 0, 0, 0)
+            for position, high, low in segments[checkpoint.index:].tolist()
+        ]
+
+        del state.zones[checkpoint.size:]
+        state.zones.extend(self._process_pivots(segments, state.checkpoints, checkpoint))
+
+        boundary = self._find_checkpoint(state.boundaries, checkpoint.size // 2)
+        rows = self._merge_overlapping_pivots(state.zones[2 * boundary.index:], state.boundaries, boundary)
+        del state.merged[2 * boundary.size:]
+        state.merged.extend(rows)
+
+        count = len(state.merged) // 2
+        if count == 0:
+            state.rows.clear()
+            state.levels.clear()
+            return 0, None
+
+        start = min(max(boundary.size - 1, 0), count - 1)
+        rows = (state.rows if start < boundary.size else state.merged)[2 * start:2 * start + 2] + state.merged[2 * start + 2:]
+        del state.levels[start:]
+        state.levels.extend(self._set_pivot_metrics(rows, macd_area, state.levels[-1] if state.levels else 0))
+        del state.rows[2 * start:]
+        state.rows.extend(rows)
+        return 2 * start, self.to_items(rows, PIVOT_DTYPE)
+
+    def _process_pivots(self, segments: List, checkpoints: List[Checkpoint], checkpoint: Checkpoint) -> List:
         rows = []
 
-        index = 0
+        index, reach = 0, -1
         while index < len(segments) - 4:
             entry_segment = segments[index]
             range_1 = self._get_range(segments, index + 1)
             range_3 = self._get_range(segments, index + 3)
             pivot = self._calculate_pivot_zone(range_1, range_3)
+            reach = max(reach, index + 4)
 
             if not self._is_valid_pivot(pivot) and not self._can_initiate_pivot(pivot, entry_segment):
                 index += 1
@@ -67,10 +179,12 @@ class Pivot(Segment):
             length = self._extend_pivots(pivot, segments, index)
             exit_segment = segments[index + length + 4]
             exit_segment = self._update_pivot_zone(pivot, range_1, exit_segment)
+            reach = len(segments) if index + length >= len(segments) - 7 else index + length + 6
 
             rows.append(range_1.start)
             rows.append(exit_segment)
             index += length + 4
+            checkpoints.append(Checkpoint(checkpoint.index + index, checkpoint.size + len(rows), checkpoint.index + reach))
 
         return rows
 
@@ -118,14 +232,16 @@ class Pivot(Segment):
             exit_segment = exit_segment._replace(high=pivot.high)
         return exit_segment
 
-    def _merge_overlapping_pivots(self, rows: List) -> None:
-        index = 0
-        while index < len(rows) - 3:
-            pivot_1 = self._get_range(rows, index)
-            pivot_2 = self._get_range(rows, index + 2)
+    def _merge_overlapping_pivots(self, rows: List, boundaries: List[Checkpoint], boundary: Checkpoint) -> List:
+        merged = rows[:2]
+        for index in range(2, len(rows) - 1, 2):
+            pivot_1 = self._get_range(merged, -2)
+            pivot_2 = self._get_range(rows, index)
 
             if not self._is_pivot_overlap(pivot_1, pivot_2):
-                index += 2
+                merged.extend(rows[index:index + 2])
+                zone = boundary.index + index // 2
+                boundaries.append(Checkpoint(zone, boundary.size + len(merged) // 2 - 1, zone))
                 continue
 
             if self.is_top(pivot_1.start):
@@ -139,23 +255,23 @@ class Pivot(Segment):
                 high = min(pivot_1.high, pivot_2.high)
                 pivot_2.end = pivot_2.end._replace(high=high)
 
-            rows[index] = pivot_1.start
-            rows[index + 3] = pivot_2.end
-            rows.remove(pivot_1.end)
-            rows.remove(pivot_2.start)
+            merged[-2] = pivot_1.start
+            merged[-1] = pivot_2.end
+        return merged
 
     @staticmethod
     def _is_pivot_overlap(range_1: Range, range_3: Range) -> bool:
         return range_3.high > range_1.low and range_3.low < range_1.high
 
-    def _set_pivot_metrics(self, rows: List, source_df: pd.DataFrame) -> None:
-        level = 0
+    def _set_pivot_metrics(self, rows: List, macd_area: MacdArea, level: int) -> List[int]:
+        levels = []
         for i in range(0, len(rows) - 3, 2):
             pivot_1 = self._get_range(rows, i)
             pivot_2 = self._get_range(rows, i + 2)
 
             level = self._set_pivot_trend(pivot_1, pivot_2, level)
-            self._set_pivot_macd(pivot_1, pivot_2, source_df)
+            levels.append(level)
+            self._set_pivot_macd(pivot_1, pivot_2, macd_area)
             self._detect_pivot_divergence(pivot_1, pivot_2)
 
             rows[i] = pivot_1.start
@@ -165,8 +281,9 @@ class Pivot(Segment):
 
         if len(rows) > 0:
             last = self._get_range(rows, -2)
-            self._set_pivot_macd(last, None, source_df)
+            self._set_pivot_macd(last, None, macd_area)
             rows[-1] = last.end
+        return levels
 
     @staticmethod
     def _set_pivot_trend(pivot_1: Range, pivot_2: Range, level: int) -> int:
@@ -191,20 +308,19 @@ class Pivot(Segment):
         return level
 
     @staticmethod
-    def _set_pivot_macd(pivot_1: Optional[Range], pivot_2: Optional[Range], source_df: pd.DataFrame) -> None:
-        mask = pd.Series([True] * len(source_df), index=source_df.index)
-        if pivot_1 is not None:
-            mask &= source_df.index >= pivot_1.end.Index
-        if pivot_2 is not None:
-            mask &= source_df.index <= pivot_2.start.Index
+    def _set_pivot_macd(pivot_1: Optional[Range], pivot_2: Optional[Range], macd_area: MacdArea) -> None:
+        start = 0 if pivot_1 is None else pivot_1.end.position
+        end = macd_area.size if pivot_2 is None else pivot_2.start.position + 1
+        end = max(start, end)
 
+        areas = macd_area.total
         if pivot_2 is not None:
             if pivot_2.start.level > 0:
-                mask &= source_df.macd > source_df.macd_dea
+                areas = macd_area.above
             elif pivot_2.start.level < 0:
-                mask &= source_df.macd < source_df.macd_dea
+                areas = macd_area.below
 
-        macd_sum = source_df[mask].macd_dif.sum()
+        macd_sum = areas[end] - areas[start]
         if pivot_1 is not None:
             pivot_1.end = pivot_1.end._replace(macd=macd_sum)
         if pivot_2 is not None:
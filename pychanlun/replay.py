@@ -0,0 +1,130 @@
+from enum import IntEnum
+from typing import Dict, Optional, List, Tuple, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from pychanlun.chan import Chan, CHANGE_LAYERS
+from pychanlun.indicator import Indicator
+from pychanlun.mapped import MappedSource
+from pychanlun.pivot import PIVOT_DTYPE
+from pychanlun.signal import SIGNAL_DTYPE
+from pychanlun.stock import ITEM_DTYPE
+
+CONSUMER = 'replay'
+LAYER_DTYPES = {
+    'strokes': ITEM_DTYPE,
+    'segments': ITEM_DTYPE,
+    'stroke_pivots': PIVOT_DTYPE,
+    'segment_pivots': PIVOT_DTYPE,
+    'stroke_signals': SIGNAL_DTYPE,
+    'segment_signals': SIGNAL_DTYPE
+}
+
+
+class ReplayAction(IntEnum):
+    ADDED = 1
+    REVISED = 0
+    RETRACTED = -1
+
+
+class ChanReplay:
+
+    def __init__(self, symbol: str, source: Dict[str, Union[pd.DataFrame, MappedSource]],
+                 layers: Sequence[str] = tuple(CHANGE_LAYERS), start: int = 0, step: int = 1,
+                 inplace: bool = True, indicators: Optional[Sequence[Indicator]] = None):
+        unknown = [layer for layer in layers if layer not in CHANGE_LAYERS]
+        if unknown:
+            raise ValueError(f"Unknown layers: {unknown}")
+        if start < 0 or step < 1:
+            raise ValueError(f"Start must not be negative and step must be positive, got {start} and {step}")
+
+        self.symbol = symbol
+        self.source = source
+        self.layers = tuple(layers)
+        self.start = start
+        self.step = step
+        self.inplace = inplace
+        self.indicators = indicators
+        self.chans: Dict[str, Chan] = {}
+        self.results: Dict[str, Dict[str, pd.DataFrame]] = {}
+
+    def run(self) -> Dict[str, Dict[str, pd.DataFrame]]:
+        for interval, bars in self.source.items():
+            if bars is not None:
+                self.results[interval] = self._replay(interval)
+        return self.results
+
+    def get(self, interval: str, layer: str) -> pd.DataFrame:
+        return self.results[interval][layer]
+
+    def _replay(self, interval: str) -> Dict[str, pd.DataFrame]:
+        bars = self.source[interval]
+        size = len(bars)
+        start = min(self.start, size)
+        chan = self.chans[interval] = Chan(self.symbol, {interval: self._slice(bars, 0, start)},
+                                           inplace=self.inplace, indicators=self.indicators)
+
+        logs: Dict[str, List[Tuple[int, np.ndarray, np.ndarray, np.ndarray]]] = {name: [] for name in self.layers}
+        if start > 0:
+            self._record(chan, interval, start - 1, logs)
+        for lower in range(start, size, self.step):
+            upper = min(lower + self.step, size)
+            chan.update(interval, self._slice(bars, lower, upper, True))
+            self._record(chan, interval, upper - 1, logs)
+        return {name: self._format_log(chan, interval, name, log) for name, log in logs.items()}
+
+    def _record(self, chan: Chan, interval: str, bar: int,
+                logs: Dict[str, List[Tuple[int, np.ndarray, np.ndarray, np.ndarray]]]) -> None:
+        for name, log in logs.items():
+            layer = CHANGE_LAYERS[name]
+            revision = chan.take_revision(interval, layer, CONSUMER)
+            if revision is None:
+                continue
+
+            row, previous, items = revision
+            unit = 2 if layer.endswith('pivots') else 1
+            old = 0 if previous is None else len(previous) // unit
+            new = 0 if items is None else len(items) // unit
+            common = min(old, new)
+
+            revised = np.flatnonzero(chan.find_differences(
+                previous[:unit * common], items[:unit * common]
+            ).reshape(common, unit).any(axis=1)) if common > 0 else np.empty(0, dtype=np.int64)
+            current = np.concatenate((revised, np.arange(common, new)))
+            rows = np.concatenate((current, np.arange(common, old)))
+            actions = np.repeat([ReplayAction.REVISED, ReplayAction.ADDED, ReplayAction.RETRACTED],
+                                [len(revised), new - common, old - common])
+
+            changed_items = [previous[unit * common:]] if old > common else []
+            if len(current) > 0:
+                changed_items.insert(0, items[(unit * current[:, None] + np.arange(unit)).ravel()])
+            log.append((bar, row + rows, actions, np.concatenate(changed_items)))
+
+    @staticmethod
+    def _format_log(chan: Chan, interval: str, name: str,
+                    log: List[Tuple[int, np.ndarray, np.ndarray, np.ndarray]]) -> pd.DataFrame:
+        index = chan.get_index(interval)
+        if log:
+            bars = np.concatenate([np.full(len(rows), bar) for bar, rows, _, _ in log])
+            rows = np.concatenate([rows for _, rows, _, _ in log])
+            actions = np.concatenate([actions for _, _, actions, _ in log])
+            items = np.concatenate([items for _, _, _, items in log])
+        else:
+            bars = rows = actions = np.empty(0, dtype=np.int64)
+            items = np.empty(0, dtype=LAYER_DTYPES[CHANGE_LAYERS[name]])
+
+        frame = chan.format_changes(interval, name, items)
+        columns = {'action': actions.astype(np.int8), 'row': rows, 'at': frame.index}
+        columns.update((column, frame[column].to_numpy()) for column in frame.columns)
+        return pd.DataFrame(columns, index=index[bars])
+
+    @staticmethod
+    def _slice(bars: Union[pd.DataFrame, MappedSource], lower: int, upper: int,
+               frame: bool = False) -> Union[pd.DataFrame, MappedSource]:
+        if not isinstance(bars, MappedSource):
+            return bars.iloc[lower:upper]
+
+        columns = {name: bars[name][lower:upper] for name in bars.columns}
+        bars = MappedSource(bars.timestamps[lower:upper], columns, bars.tz)
+        return bars.to_frame() if frame else bars
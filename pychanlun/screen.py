@@ -0,0 +1,145 @@
+from typing import Dict, Optional, List, Set, Tuple, Iterable, Mapping, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from pychanlun.chan import Chan, TimeLike
+
+Key = Tuple[Union[str, int], ...]
+Postings = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+LEVELS = ('stroke', 'segment')
+
+
+class ChanScreen:
+
+    def __init__(self, chans: Optional[Mapping[str, Chan]] = None, intervals: Optional[Sequence[str]] = None):
+        self.symbols: List[str] = []
+        self._symbol_ids: Dict[str, int] = {}
+        self._indexes: Dict[str, Dict[int, pd.DatetimeIndex]] = {}
+        self._entries: Dict[Key, Dict[int, Tuple[np.ndarray, np.ndarray]]] = {}
+        self._keys: Dict[int, Set[Key]] = {}
+        self._postings: Dict[Key, Postings] = {}
+        for symbol, chan in ({} if chans is None else chans).items():
+            self.update(symbol, chan, intervals)
+
+    def update(self, symbol: str, chan: Chan, intervals: Optional[Sequence[str]] = None) -> None:
+        self.remove(symbol)
+        symbol_id = self._symbol_ids.setdefault(symbol, len(self.symbols))
+        if symbol_id == len(self.symbols):
+            self.symbols.append(symbol)
+
+        for interval in (chan.intervals if intervals is None else intervals):
+            index = chan.get_index(interval)
+            if index is None or index.empty:
+                continue
+
+            self._indexes.setdefault(interval, {})[symbol_id] = index
+            for level in LEVELS:
+                signals = getattr(chan, f'{level}_signals')[interval]
+                if signals is not None:
+                    self._add_entries(symbol_id, index, signals['position'], ('signal', interval, level),
+                                      signals['signal'])
+                pivots = getattr(chan, f'{level}_pivots')[interval]
+                if pivots is not None:
+                    entries = pivots[::2]
+                    self._add_entries(symbol_id, index, entries['position'], ('pivot', interval, level),
+                                      entries['level'], entries['status'])
+
+    def remove(self, symbol: str) -> None:
+        symbol_id = self._symbol_ids.get(symbol)
+        if symbol_id is None:
+            return
+
+        for key in self._keys.pop(symbol_id, ()):
+            del self._entries[key][symbol_id]
+            self._postings.pop(key, None)
+        for indexes in self._indexes.values():
+            indexes.pop(symbol_id, None)
+
+    def find_signals(self, interval: str, level: str, signal: int, start: Optional[TimeLike] = None,
+                     end: Optional[TimeLike] = None, last_n: Optional[int] = None) -> Set[str]:
+        return self._find([('signal', interval, level, int(signal))], interval, start, end, last_n)
+
+    def find_pivots(self, interval: str, level: str, status: Optional[int] = None, pivot_level: Optional[int] = None,
+                    start: Optional[TimeLike] = None, end: Optional[TimeLike] = None,
+                    last_n: Optional[int] = None) -> Set[str]:
+        keys = [
+            key for key in self._entries if key[:3] == ('pivot', interval, level) and
+            (pivot_level is None or key[3] == pivot_level) and (status is None or key[4] == status)
+        ]
+        return self._find(keys, interval, start, end, last_n)
+
+    def _add_entries(self, symbol_id: int, index: pd.DatetimeIndex, positions: np.ndarray, prefix: Key,
+                     *values: np.ndarray) -> None:
+        if len(positions) == 0:
+            return
+
+        times = index[positions].as_unit('ns').asi8
+        groups, inverse = np.unique(np.stack(values, axis=1), axis=0, return_inverse=True)
+        order = np.argsort(inverse.ravel(), kind='stable')
+        bounds = np.searchsorted(inverse.ravel()[order], np.arange(len(groups) + 1))
+        for group, lower, upper in zip(groups.tolist(), bounds[:-1], bounds[1:]):
+            key = prefix + tuple(group)
+            selected = order[lower:upper]
+            self._entries.setdefault(key, {})[symbol_id] = (times[selected], positions[selected])
+            self._keys.setdefault(symbol_id, set()).add(key)
+            self._postings.pop(key, None)
+
+    def _merge_postings(self, key: Key) -> Postings:
+        postings = self._postings.get(key)
+        if postings is not None:
+            return postings
+
+        entries = self._entries.get(key, {})
+        times = np.concatenate([times for times, _ in entries.values()] or [np.zeros(0, dtype=np.int64)])
+        positions = np.concatenate([positions for _, positions in entries.values()] or [np.zeros(0, dtype=np.int64)])
+        symbols = np.repeat(np.fromiter(entries.keys(), dtype=np.int64, count=len(entries)),
+                            [len(times) for times, _ in entries.values()])
+        order = np.argsort(times, kind='stable')
+        postings = self._postings[key] = (times[order], symbols[order], positions[order])
+        return postings
+
+    def _find(self, keys: Iterable[Key], interval: str, start: Optional[TimeLike], end: Optional[TimeLike],
+              last_n: Optional[int]) -> Set[str]:
+        if start is not None and last_n is not None:
+            raise ValueError("Use either start or last_n, not both")
+        if last_n is not None and last_n < 0:
+            raise ValueError(f"last_n must not be negative, got {last_n}")
+
+        starts = None if start is None else self._to_values(interval, start)
+        ends = None if end is None else self._to_values(interval, end)
+        limits = None if last_n is None else self._find_limits(interval, end, last_n)
+        found = []
+        for key in keys:
+            times, symbols, positions = self._merge_postings(key)
+            if len(times) == 0:
+                continue
+
+            lower = 0 if starts is None else np.searchsorted(times, starts.min(), side='left')
+            upper = len(times) if ends is None else np.searchsorted(times, ends.max(), side='right')
+            times, symbols, positions = times[lower:upper], symbols[lower:upper], positions[lower:upper]
+            selected = np.ones(len(symbols), dtype=bool)
+            if starts is not None:
+                selected &= times >= starts[symbols]
+            if ends is not None:
+                selected &= times <= ends[symbols]
+            if limits is not None:
+                selected &= positions >= limits[symbols]
+            found.append(symbols[selected])
+        return {self.symbols[symbol_id] for symbol_id in np.unique(np.concatenate(found or [np.zeros(0, np.int64)]))}
+
+    def _to_values(self, interval: str, value: TimeLike) -> np.ndarray:
+        indexes = self._indexes.get(interval, {})
+        values = {index.tz: Chan.to_timestamp(value, index.tz).as_unit('ns').value for index in indexes.values()}
+        bounds = np.zeros(len(self.symbols), dtype=np.int64)
+        for symbol_id, index in indexes.items():
+            bounds[symbol_id] = values[index.tz]
+        return bounds
+
+    def _find_limits(self, interval: str, end: Optional[TimeLike], last_n: int) -> np.ndarray:
+        limits = np.zeros(len(self.symbols), dtype=np.int64)
+        for symbol_id, index in self._indexes.get(interval, {}).items():
+            upper = len(index) if end is None else index.searchsorted(Chan.to_timestamp(end, index.tz), side='right')
+            limits[symbol_id] = upper - last_n
+        return limits
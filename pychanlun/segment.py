@@ -1,131 +1,139 @@
-from typing import Dict, Optional, List
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
+from typing import Dict, Optional, List, Sequence
 
+import numpy as np
 import pandas as pd
 
-from pychanlun.stroke import Stroke, Item
+from pychanlun.cache import LayerCache
+from pychanlun.indicator import Indicator
+from pychanlun.stock import Checkpoint, Layer
+from pychanlun.stroke import Stroke
+
+
+@dataclass
+class SegmentState:
+    highs: List[float]
+    lows: List[float]
+    tops: List[bool]
+    bottoms: List[bool]
+    count: int = 0
+    first: int = -1
+    lowest: int = -1
+    highest: int = -1
+    recent: List[int] = field(default_factory=lambda: [0] * 4)
 
 
 class Segment(Stroke):
 
-    def __init__(self, symbol: str, source: Dict[str, pd.DataFrame]):
-        self.segments: Dict[str, Optional[pd.DataFrame]] = {}
-        super().__init__(symbol, source)
+    def __init__(self, symbol: str, source: Dict[str, pd.DataFrame], executor: Optional[Executor] = None,
+                 cache: Optional[LayerCache] = None, inplace: bool = True,
+                 indicators: Optional[Sequence[Indicator]] = None):
+        self.segments: Dict[str, Optional[np.ndarray]] = Layer(self._compute_segments, 'strokes')
+        self._segment_checkpoints: Dict[str, List[Checkpoint]] = {}
+        super().__init__(symbol, source, executor, cache, inplace, indicators)
 
     def _process_interval(self, interval: str) -> None:
         super()._process_interval(interval)
+        self.segments[interval]
+
+    def _invalidate_interval(self, interval: str) -> None:
+        super()._invalidate_interval(interval)
+        self.segments.invalidate(interval)
+
+    def _compute_segments(self, interval: str) -> Optional[np.ndarray]:
+        strokes = self.strokes[interval]
+        if strokes is None or len(strokes) == 0:
+            self._segment_checkpoints.pop(interval, None)
+            self._mark_changed(interval, 'segments', 0)
+            return None
+
+        checkpoints = self._segment_checkpoints.setdefault(interval, [Checkpoint(0, 0, -1)])
+        changed = self._take_changed(interval, 'strokes', 'segments', len(strokes))
+        checkpoint = self._find_checkpoint(checkpoints, changed)
+
+        segments = self._form_segments(strokes, checkpoints, checkpoint)
+        self._mark_changed(interval, 'segments', checkpoint.size)
+        return self._splice(interval, 'segments', checkpoint.size, segments)
+
+    def _form_segments(self, strokes: np.ndarray, checkpoints: List[Checkpoint],
+                       checkpoint: Checkpoint) -> Optional[np.ndarray]:
+        items = strokes[checkpoint.index:]
+        has_high, has_low = ~np.isnan(items['high']), ~np.isnan(items['low'])
+        state = SegmentState(items['high'].tolist(), items['low'].tolist(), (has_high & ~has_low).tolist(),
+                             (has_low & ~has_high).tolist())
+        rows, last = [], len(items) - 1
+
+        for offset in range(len(items)):
+            self._advance_segment(state, rows, offset, offset == last)
+            index = checkpoint.index + offset
+            if offset == last:
+                rows.append(offset)
+            elif state.count == 1 and index > checkpoints[-1].index:
+                checkpoints.append(Checkpoint(index, checkpoint.size + len(rows), index - 1))
+
+        return items[rows] if rows else None
+
+    def _advance_segment(self, state: SegmentState, rows: List[int], offset: int, is_last_stroke: bool) -> None:
+        recent = state.recent
+        recent[state.count % 4] = offset
+        state.count += 1
+        if state.count == 1:
+            state.first = offset
+            return
+        if state.count >= 7:
+            self._track_middle(state, recent[state.count % 4])
 
-        stroke_df = self.strokes[interval]
-        if stroke_df is None or stroke_df.empty:
-            self.segments[interval] = None
+        curr_stroke, next_stroke = state.first, recent[(state.count - 3) % 4]
+        if state.count == 2:
             return
+        elif state.count in (3, 5):
+            if not is_last_stroke and not self._is_valid_segment(state, curr_stroke, offset):
+                return
+        elif state.count % 2 == 0:
+            if not is_last_stroke and not self._is_segment_extend(state, curr_stroke, next_stroke, offset):
+                return
+            rows.append(curr_stroke)
+        else:
+            if not is_last_stroke and not self._can_split_from_middle(state, curr_stroke, next_stroke, offset):
+                return
+            rows.append(curr_stroke)
+            rows.append(self._find_middle_stroke(state, curr_stroke))
 
-        strokes = list(stroke_df.itertuples())
-
-        segment_df = self._form_segments(strokes)
-        self.segments[interval] = segment_df
-
-    def _form_segments(self, strokes: List) -> Optional[pd.DataFrame]:
-        rows, temps = [], []
-        for index, stroke in enumerate(strokes):
-            temps.append(Item(index, stroke))
-
-            is_last_stroke = index == len(strokes) - 1
-            temps = self._process_strokes(rows, temps, is_last_stroke)
-            if is_last_stroke:
-                rows.append(stroke)
-
-        return self.to_dataframe(rows, ['high', 'low'])
-
-    def _process_strokes(self, rows: List, temps: List[Item], is_last_stroke: bool) -> List[Item]:
-        count = len(temps)
-        if count == 3:
-            return self._handle_three_strokes(temps, is_last_stroke)
-        elif count == 4:
-            return self._handle_four_strokes(rows, temps, is_last_stroke)
-        elif count == 5:
-            return self._handle_five_strokes(temps, is_last_stroke)
-        elif count >= 6 and count % 2 == 0:
-            return self._handle_even_strokes(rows, temps, is_last_stroke)
-        elif count >= 7 and count % 2 != 0:
-            return self._handle_odd_strokes(rows, temps, is_last_stroke)
-        return temps
-
-    def _handle_three_strokes(self, temps: List[Item], is_last_stroke: bool) -> List[Item]:
-        curr_stroke, next_stroke = temps[0], temps[2]
-        if is_last_stroke or self._is_valid_segment(curr_stroke, next_stroke):
-            return [next_stroke]
-        return temps
-
-    def _handle_four_strokes(self, rows: List, temps: List[Item], is_last_stroke: bool) -> List[Item]:
-        curr_stroke, next_stroke, last_stroke = temps[0], temps[1], temps[3]
-        if is_last_stroke or self._is_segment_extend(curr_stroke, next_stroke, last_stroke):
-            rows.append(curr_stroke.item)
-            return [last_stroke]
-        return temps
-
-    def _handle_five_strokes(self, temps: List[Item], is_last_stroke: bool) -> List[Item]:
-        curr_stroke, next_stroke = temps[0], temps[4]
-        if is_last_stroke or self._is_valid_segment(curr_stroke, next_stroke):
-            return [next_stroke]
-        return temps
-
-    def _handle_even_strokes(self, rows: List, temps: List[Item], is_last_stroke: bool) -> List[Item]:
-        curr_stroke, next_stroke, last_stroke = temps[0], temps[-3], temps[-1]
-        if is_last_stroke or self._is_segment_extend(curr_stroke, next_stroke, last_stroke):
-            rows.append(curr_stroke.item)
-            return [last_stroke]
-        return temps
-
-    def _handle_odd_strokes(self, rows: List, temps: List[Item], is_last_stroke: bool) -> List[Item]:
-        curr_stroke, next_stroke, last_stroke = temps[0], temps[-3], temps[-1]
-        if is_last_stroke or self._can_split_from_middle(curr_stroke, next_stroke, last_stroke):
-            rows.append(curr_stroke.item)
-            mid_stroke = self._find_middle_stroke(temps, curr_stroke)
-            rows.append(mid_stroke.item)
-            return [last_stroke]
-        return temps
-
-    def _is_valid_segment(self, curr_stroke: Item, next_stroke: Item) -> bool:
-        if self.is_top(curr_stroke.item):
-            return next_stroke.item.high >= curr_stroke.item.high
-        elif self.is_bottom(curr_stroke.item):
-            return next_stroke.item.low <= curr_stroke.item.low
-        return False
+        recent[0] = state.first = offset
+        state.count, state.lowest, state.highest = 1, -1, -1
 
-    def _is_segment_extend(self, curr_stroke: Item, next_stroke: Item, last_stroke: Item) -> bool:
-        if self.is_top(curr_stroke.item):
-            return last_stroke.item.low <= next_stroke.item.low
-        elif self.is_bottom(curr_stroke.item):
-            return last_stroke.item.high >= next_stroke.item.high
-        return False
+    @staticmethod
+    def _track_middle(state: SegmentState, stroke: int) -> None:
+        if state.lowest < 0 or state.lows[stroke] < state.lows[state.lowest]:
+            state.lowest = stroke
+        if state.highest < 0 or state.highs[stroke] > state.highs[state.highest]:
+            state.highest = stroke
 
-    def _can_split_from_middle(self, curr_stroke: Item, next_stroke: Item, last_stroke: Item) -> bool:
-        if self.is_top(curr_stroke.item):
-            return last_stroke.item.high >= next_stroke.item.high
-        elif self.is_bottom(curr_stroke.item):
-            return last_stroke.item.low <= next_stroke.item.low
+    @staticmethod
+    def _is_valid_segment(state: SegmentState, curr_stroke: int, next_stroke: int) -> bool:
+        if state.tops[curr_stroke]:
+            return state.highs[next_stroke] >= state.highs[curr_stroke]
+        elif state.bottoms[curr_stroke]:
+            return state.lows[next_stroke] <= state.lows[curr_stroke]
         return False
 
-    def _find_middle_stroke(self, temps: List[Item], curr_stroke: Item) -> Item:
-        if self.is_top(curr_stroke.item):
-            return self._find_lowest_middle(temps)
-        else:
-            return self._find_highest_middle(temps)
+    @staticmethod
+    def _is_segment_extend(state: SegmentState, curr_stroke: int, next_stroke: int, last_stroke: int) -> bool:
+        if state.tops[curr_stroke]:
+            return state.lows[last_stroke] <= state.lows[next_stroke]
+        elif state.bottoms[curr_stroke]:
+            return state.highs[last_stroke] >= state.highs[next_stroke]
+        return False
 
     @staticmethod
-    def _find_lowest_middle(temps: List[Item]) -> Item:
-        lowest = None
-        for index in range(3, len(temps) - 3):
-            stroke = temps[index]
-            if lowest is None or stroke.item.low < lowest.item.low:
-                lowest = stroke
-        return lowest
+    def _can_split_from_middle(state: SegmentState, curr_stroke: int, next_stroke: int, last_stroke: int) -> bool:
+        if state.tops[curr_stroke]:
+            return state.highs[last_stroke] >= state.highs[next_stroke]
+        elif state.bottoms[curr_stroke]:
+            return state.lows[last_stroke] <= state.lows[next_stroke]
+        return False
 
     @staticmethod
-    def _find_highest_middle(temps: List[Item]) -> Item:
-        highest = None
-        for index in range(3, len(temps) - 3):
-            stroke = temps[index]
-            if highest is None or stroke.item.high > highest.item.high:
-                highest = stroke
-        return highest
+    def _find_middle_stroke(state: SegmentState, curr_stroke: int) -> int:
+        return state.lowest if state.tops[curr_stroke] else state.highest
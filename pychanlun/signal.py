@@ -1,8 +1,16 @@
+from concurrent.futures import Executor
 from enum import IntEnum
-from typing import Dict, Optional, List
+from typing import Dict, Optional, List, Tuple, Sequence
 
+import numpy as np
 import pandas as pd
-from pychanlun.pivot import Pivot, Range
+from pychanlun.cache import LayerCache
+from pychanlun.indicator import Indicator
+from pychanlun.pivot import Pivot
+from pychanlun.stock import Layer
+
+
+SIGNAL_DTYPE = np.dtype([('position', np.int64), ('high', np.float64), ('low', np.float64), ('signal', np.int64)])
 
 
 class SignalType(IntEnum):
@@ -16,103 +24,141 @@ class SignalType(IntEnum):
 
 class Signal(Pivot):
 
-    def __init__(self, symbol: str, source: Dict[str, pd.DataFrame]):
-        self.stroke_signals: Dict[str, Optional[pd.DataFrame]] = {}
-        self.segment_signals: Dict[str, Optional[pd.DataFrame]] = {}
-        super().__init__(symbol, source)
+    def __init__(self, symbol: str, source: Dict[str, pd.DataFrame], executor: Optional[Executor] = None,
+                 cache: Optional[LayerCache] = None, inplace: bool = True,
+                 indicators: Optional[Sequence[Indicator]] = None):
+        self.stroke_signals: Dict[str, Optional[np.ndarray]] = Layer(self._compute_stroke_signals, 'stroke_pivots')
+        self.segment_signals: Dict[str, Optional[np.ndarray]] = Layer(self._compute_segment_signals, 'segment_pivots')
+        self._stroke_signal_sizes: Dict[str, List[int]] = {}
+        self._segment_signal_sizes: Dict[str, List[int]] = {}
+        super().__init__(symbol, source, executor, cache, inplace, indicators)
 
     def _process_interval(self, interval: str) -> None:
         super()._process_interval(interval)
-
-        stroke_df = self.strokes[interval]
-        stroke_pivot_df = self.stroke_pivots[interval]
-        if stroke_df is not None and stroke_pivot_df is not None:
-            self.stroke_signals[interval] = self._generate_signals(stroke_df, stroke_pivot_df)
-        else:
-            self.stroke_signals[interval] = None
-
-        segment_df = self.segments[interval]
-        segment_pivot_df = self.segment_pivots[interval]
-        if segment_df is not None and segment_pivot_df is not None:
-            self.segment_signals[interval] = self._generate_signals(segment_df, segment_pivot_df)
+        self.stroke_signals[interval]
+        self.segment_signals[interval]
+
+    def _invalidate_interval(self, interval: str) -> None:
+        super()._invalidate_interval(interval)
+        self.stroke_signals.invalidate(interval)
+        self.segment_signals.invalidate(interval)
+
+    def _compute_stroke_signals(self, interval: str) -> Optional[np.ndarray]:
+        strokes = self.strokes[interval]
+        stroke_pivots = self.stroke_pivots[interval]
+        if strokes is None or stroke_pivots is None:
+            self._stroke_signal_sizes.pop(interval, None)
+            self._mark_changed(interval, 'stroke_signals', 0)
+            return None
+
+        sizes = self._stroke_signal_sizes.setdefault(interval, [0])
+        stroke_changed = self._take_changed(interval, 'strokes', 'stroke_signals', len(strokes))
+        pivot_changed = self._take_changed(interval, 'stroke_pivots', 'stroke_signals', len(stroke_pivots))
+        changed, signals = self._generate_signals(strokes, stroke_pivots, sizes, stroke_changed, pivot_changed)
+        self._mark_changed(interval, 'stroke_signals', changed)
+        return self._splice(interval, 'stroke_signals', changed, signals)
+
+    def _compute_segment_signals(self, interval: str) -> Optional[np.ndarray]:
+        segments = self.segments[interval]
+        segment_pivots = self.segment_pivots[interval]
+        if segments is None or segment_pivots is None:
+            self._segment_signal_sizes.pop(interval, None)
+            self._mark_changed(interval, 'segment_signals', 0)
+            return None
+
+        sizes = self._segment_signal_sizes.setdefault(interval, [0])
+        segment_changed = self._take_changed(interval, 'segments', 'segment_signals', len(segments))
+        pivot_changed = self._take_changed(interval, 'segment_pivots', 'segment_signals', len(segment_pivots))
+        changed, signals = self._generate_signals(segments, segment_pivots, sizes, segment_changed, pivot_changed)
+        self._mark_changed(interval, 'segment_signals', changed)
+        return self._splice(interval, 'segment_signals', changed, signals)
+
+    def _generate_signals(self, segments: np.ndarray, pivots: np.ndarray, sizes: List[int],
+                          segment_changed: int, pivot_changed: int) -> Tuple[int, Optional[np.ndarray]]:
+        start = min(max(pivot_changed // 2 - 1, 0), len(sizes) - 1)
+        if segment_changed > 0:
+            ends = pivots['position'][3::2]
+            start = min(start, int(np.searchsorted(ends, segments['position'][segment_changed - 1], side='right')))
         else:
-            self.segment_signals[interval] = None
-
-    def _generate_signals(self, segment_df: pd.DataFrame, pivot_df: pd.DataFrame) -> Optional[pd.DataFrame]:
-        segment_df = pd.DataFrame(segment_df)
-        segment_df['signal'] = 0
-
-        pivots = list(pivot_df.itertuples())
-
-        rows = []
-
-        for index in range(0, len(pivots) - 3, 2):
-            curr_pivot = self._get_range(pivots, index)
-            next_pivot = self._get_range(pivots, index + 2)
-            segments = list(segment_df.loc[curr_pivot.end.Index: next_pivot.end.Index].itertuples())
-
-            if curr_pivot.start.status > 0:
-                if curr_pivot.end.level > curr_pivot.start.level:
-                    self._check_first_second_sell(rows, segments)
-                elif curr_pivot.end.level < curr_pivot.start.level:
-                    self._check_first_second_buy(rows, segments)
-
-            if curr_pivot.start.status == 0:
-                self._check_third_sell(rows, segments, curr_pivot)
-                self._check_third_buy(rows, segments, curr_pivot)
-
-        return self.to_dataframe(rows, ['high', 'low', 'signal'])
-
-    def _check_first_second_sell(self, rows: List, segments: List) -> None:
-        if len(segments) < 4:
-            return
-
-        for i in range(len(segments) - 3):
-            next_segment_1 = segments[i + 1]
-            next_segment_3 = segments[i + 3]
-
-            if self.is_top(next_segment_1) and next_segment_3.high < next_segment_1.high:
-                rows.append(next_segment_1._replace(signal=SignalType.FIRST_SELL))
-                rows.append(next_segment_3._replace(signal=SignalType.SECOND_SELL))
-                return
-
-    def _check_first_second_buy(self, rows: List, segments: List) -> None:
-        if len(segments) < 4:
-            return
-
-        for i in range(len(segments) - 3):
-            next_segment_1 = segments[i + 1]
-            next_segment_3 = segments[i + 3]
-
-            if self.is_bottom(next_segment_1) and next_segment_3.low > next_segment_1.low:
-                rows.append(next_segment_1._replace(signal=SignalType.FIRST_BUY))
-                rows.append(next_segment_3._replace(signal=SignalType.SECOND_BUY))
-                return
-
-    def _check_third_sell(self, rows: List, segments: List, curr_pivot: Range) -> None:
-        if len(segments) < 3:
-            return
-
-        next_segment_1 = segments[1]
-        next_segment_2 = segments[2]
-
-        if self.is_top(next_segment_1):
-            if next_segment_1.high < curr_pivot.low:
-                rows.append(next_segment_1._replace(signal=SignalType.THIRD_SELL))
-        if self.is_top(next_segment_2):
-            if next_segment_2.high < curr_pivot.low:
-                rows.append(next_segment_2._replace(signal=SignalType.THIRD_SELL))
-
-    def _check_third_buy(self, rows: List, segments: List, curr_pivot: Range) -> None:
-        if len(segments) < 3:
-            return
-
-        next_segment_1 = segments[1]
-        next_segment_2 = segments[2]
-
-        if self.is_bottom(next_segment_1):
-            if next_segment_1.low > curr_pivot.high:
-                rows.append(next_segment_1._replace(signal=SignalType.THIRD_BUY))
-        if self.is_bottom(next_segment_2):
-            if next_segment_2.low > curr_pivot.high:
-                rows.append(next_segment_2._replace(signal=SignalType.THIRD_BUY))
+            start = 0
+
+        size = sizes[start]
+        del sizes[start:]
+
+        pivots = pivots[2 * start:]
+        count = max(len(pivots) // 2 - 1, 0)
+        if count == 0:
+            sizes.append(size)
+            return size, None
+
+        positions, highs, lows = segments['position'], segments['high'], segments['low']
+        tops = np.isnan(lows) & ~np.isnan(highs)
+        bottoms = np.isnan(highs) & ~np.isnan(lows)
+        lefts = np.searchsorted(positions, pivots['position'][1:2 * count:2], side='left')
+        rights = np.searchsorted(positions, pivots['position'][3:2 * count + 2:2], side='right')
+
+        starts, ends = pivots[0:2 * count:2], pivots[1:2 * count:2]
+        pivot_highs = np.where(np.isnan(starts['low']) & ~np.isnan(starts['high']), starts['high'], ends['high'])
+        pivot_lows = np.where(np.isnan(starts['high']) & ~np.isnan(starts['low']), starts['low'], ends['low'])
+        sells = (starts['status'] > 0) & (ends['level'] > starts['level'])
+        buys = (starts['status'] > 0) & (ends['level'] < starts['level'])
+        thirds = (starts['status'] == 0) & (rights - lefts >= 3)
+
+        first = np.where(sells, self._check_first_second_sell(highs, tops, lefts, rights),
+                         np.where(buys, self._check_first_second_buy(lows, bottoms, lefts, rights), -1))
+        next_1, next_2 = np.minimum(lefts + 1, len(positions) - 1), np.minimum(lefts + 2, len(positions) - 1)
+
+        indices = np.stack((first + 1, first + 3, next_1, next_2, next_1, next_2), axis=1)
+        signals = np.stack((
+            np.where(sells, SignalType.FIRST_SELL, SignalType.FIRST_BUY),
+            np.where(sells, SignalType.SECOND_SELL, SignalType.SECOND_BUY),
+            np.full(count, SignalType.THIRD_SELL),
+            np.full(count, SignalType.THIRD_SELL),
+            np.full(count, SignalType.THIRD_BUY),
+            np.full(count, SignalType.THIRD_BUY)
+        ), axis=1)
+        found = np.stack((
+            first >= 0,
+            first >= 0,
+            self._check_third_sell(highs, tops, next_1, thirds, pivot_lows),
+            self._check_third_sell(highs, tops, next_2, thirds, pivot_lows),
+            self._check_third_buy(lows, bottoms, next_1, thirds, pivot_highs),
+            self._check_third_buy(lows, bottoms, next_2, thirds, pivot_highs)
+        ), axis=1)
+
+        sizes.extend((size + np.concatenate(([0], np.cumsum(found.sum(axis=1))))).tolist())
+        indices = indices[found]
+        if len(indices) == 0:
+            return size, None
+
+        items = np.empty(len(indices), dtype=SIGNAL_DTYPE)
+        items['position'] = positions[indices]
+        items['high'] = highs[indices]
+        items['low'] = lows[indices]
+        items['signal'] = signals[found]
+        return size, items
+
+    @staticmethod
+    def _find_first(conditions: np.ndarray, lefts: np.ndarray, rights: np.ndarray) -> np.ndarray:
+        indices = np.where(conditions, np.arange(len(conditions)), len(conditions))
+        following = np.append(np.minimum.accumulate(indices[::-1])[::-1], len(conditions))
+        first = following[np.minimum(lefts, len(conditions))]
+        return np.where(first < rights, first, -1)
+
+    def _check_first_second_sell(self, highs: np.ndarray, tops: np.ndarray, lefts: np.ndarray,
+                                 rights: np.ndarray) -> np.ndarray:
+        return self._find_first(tops[1:-2] & (highs[3:] < highs[1:-2]), lefts, rights - 3)
+
+    def _check_first_second_buy(self, lows: np.ndarray, bottoms: np.ndarray, lefts: np.ndarray,
+                                rights: np.ndarray) -> np.ndarray:
+        return self._find_first(bottoms[1:-2] & (lows[3:] > lows[1:-2]), lefts, rights - 3)
+
+    @staticmethod
+    def _check_third_sell(highs: np.ndarray, tops: np.ndarray, indices: np.ndarray, windows: np.ndarray,
+                          pivot_lows: np.ndarray) -> np.ndarray:
+        return windows & tops[indices] & (highs[indices] < pivot_lows)
+
+    @staticmethod
+    def _check_third_buy(lows: np.ndarray, bottoms: np.ndarray, indices: np.ndarray, windows: np.ndarray,
+                         pivot_highs: np.ndarray) -> np.ndarray:
+        return windows & bottoms[indices] & (lows[indices] > pivot_highs)
@@ -1,85 +1,151 @@
-from typing import Dict, Optional, List, Tuple
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from typing import Dict, Optional, List, Tuple, Union, Sequence
 
+import numpy as np
 import pandas as pd
-from pychanlun.stock import Stock
+from pychanlun.cache import LayerCache
+from pychanlun.indicator import Indicator
+from pychanlun.mapped import MappedSource
+from pychanlun.stock import Stock, Layer, ITEM_DTYPE
 
+STICK_DTYPE = np.dtype(ITEM_DTYPE.descr + [('start', np.int64)])
 
-class Stick(Stock):
-
-    def __init__(self, symbol: str, source: Dict[str, pd.DataFrame]):
-        self.sticks: Dict[str, Optional[pd.DataFrame]] = {}
-        super().__init__(symbol, source)
-
-    def _process_interval(self, interval: str) -> None:
-        super()._process_interval(interval)
-
-        source_df = self.sources[interval]
-        if source_df is None or source_df.empty:
-            self.sticks[interval] = None
-            return
 
-        sources = list(source_df.itertuples())
+@dataclass
+class StickState:
+    size: int = 0
+    count: int = 0
+    index: int = -1
+    start: int = -1
+    high_index: int = -1
+    low_index: int = -1
+    high: float = np.nan
+    low: float = np.nan
+    prev_high: float = np.nan
+    prev_low: float = np.nan
 
-        index = self._find_initial_direction(sources)
-        if index is None:
-            self.sticks[interval] = None
-            return
 
-        stick_df = self._merge_to_sticks(sources, index)
-        self.sticks[interval] = stick_df
+class Stick(Stock):
+    CHUNK_SIZE = 1 << 20
+    STATE_TYPES = (*Stock.STATE_TYPES, StickState)
 
-    def _find_initial_direction(self, sources: List) -> Optional[int]:
-        for index in range(len(sources) - 1):
-            prev_source, curr_source = sources[index], sources[index + 1]
-            if self._is_going_up(prev_source, curr_source) or self._is_going_down(prev_source, curr_source):
-                return index
-        return None
+    def __init__(self, symbol: str, source: Dict[str, pd.DataFrame], executor: Optional[Executor] = None,
+                 cache: Optional[LayerCache] = None, inplace: bool = True,
+                 indicators: Optional[Sequence[Indicator]] = None):
+        self.sticks: Dict[str, Optional[np.ndarray]] = Layer(self._compute_sticks, 'sources')
+        self._stick_states: Dict[str, StickState] = {}
+        super().__init__(symbol, source, executor, cache, inplace, indicators)
 
-    @staticmethod
-    def _is_going_up(curr_source: Tuple, next_source: Tuple) -> bool:
-        return curr_source.high < next_source.high and curr_source.low < next_source.low
+    def _process_interval(self, interval: str) -> None:
+        super()._process_interval(interval)
+        self.sticks[interval]
+
+    def _invalidate_interval(self, interval: str) -> None:
+        super()._invalidate_interval(interval)
+        self.sticks.invalidate(interval)
+
+    def _compute_sticks(self, interval: str) -> Optional[np.ndarray]:
+        bars = self._bars(interval)
+        if bars is None or bars.empty:
+            self._stick_states.pop(interval, None)
+            self._mark_changed(interval, 'sticks', 0)
+            return None
+
+        state = self._stick_states.setdefault(interval, StickState())
+        changed = state.count
+
+        sticks = self._merge_to_sticks(bars, state)
+        self._mark_changed(interval, 'sticks', changed)
+        return self._splice(interval, 'sticks', changed, sticks)
+
+    def _merge_to_sticks(self, bars: Union[pd.DataFrame, MappedSource], state: StickState) -> Optional[np.ndarray]:
+        highs = np.asarray(bars['high'])
+        lows = np.asarray(bars['low'])
+
+        chunks = [[], [], [], []]
+        for end in range(min(state.size + self.CHUNK_SIZE, len(highs)), len(highs) + self.CHUNK_SIZE, self.CHUNK_SIZE):
+            positions = self._merge_positions(highs[:end], lows[:end], state)
+            if positions is None:
+                continue
+            for chunk, position in zip(chunks, positions):
+                chunk.append(np.array(position[:-1] if end < len(highs) else position, dtype=np.intp))
+
+        if not chunks[0]:
+            return None
+
+        index, high_index, low_index, starts = (np.concatenate(chunk) for chunk in chunks)
+        sticks = np.empty(len(index), dtype=STICK_DTYPE)
+        sticks['position'] = index
+        sticks['start'] = starts
+        sticks['high'] = highs[high_index]
+        sticks['low'] = lows[low_index]
+        return sticks
 
     @staticmethod
-    def _is_going_down(curr_source: Tuple, next_source: Tuple) -> bool:
-        return curr_source.high > next_source.high and curr_source.low > next_source.low
-
-    def _merge_to_sticks(self, sources: List, index: int) -> Optional[pd.DataFrame]:
-        rows = [sources[index]]
-
-        prev_source, curr_source = sources[index], sources[index + 1]
-        for index in range(index + 2, len(sources)):
-            next_source = sources[index]
-            is_going_up = self._is_going_up(prev_source, curr_source)
-
-            if self._can_merge_inside(curr_source, next_source):
-                curr_source = self._merge_inside(curr_source, next_source, is_going_up)
-            elif self._can_merge_outside(curr_source, next_source):
-                curr_source = self._merge_outside(curr_source, next_source, is_going_up)
+    def _merge_positions(highs: np.ndarray, lows: np.ndarray,
+                         state: StickState) -> Optional[Tuple[List[int], List[int], List[int], List[int]]]:
+        offset = state.size if state.index >= 0 else max(state.size - 1, 0)
+        next_highs, next_lows = highs[offset:].tolist(), lows[offset:].tolist()
+        count = len(next_highs)
+        state.size = offset + count
+
+        index, high_index, low_index, starts = [], [], [], []
+
+        if state.index < 0:
+            start = 0
+            while start < count - 1:
+                prev_high, prev_low = next_highs[start], next_lows[start]
+                curr_high, curr_low = next_highs[start + 1], next_lows[start + 1]
+                if (prev_high < curr_high and prev_low < curr_low) or (prev_high > curr_high and prev_low > curr_low):
+                    break
+                start += 1
             else:
-                rows.append(curr_source)
-                prev_source, curr_source = curr_source, next_source
-
-        rows.append(curr_source)
-        return self.to_dataframe(rows, ['high', 'low'])
-
-    @staticmethod
-    def _can_merge_inside(curr_source: Tuple, next_source: Tuple) -> bool:
-        return curr_source.high >= next_source.high and curr_source.low <= next_source.low
-
-    @staticmethod
-    def _can_merge_outside(curr_source: Tuple, next_source: Tuple) -> bool:
-        return curr_source.high <= next_source.high and curr_source.low >= next_source.low
-
-    @staticmethod
-    def _merge_inside(curr_source: Tuple, next_source: Tuple, is_going_up: bool) -> Tuple:
-        if is_going_up:
-            return curr_source._replace(low=next_source.low)
-        else:
-            return curr_source._replace(high=next_source.high)
-
-    @staticmethod
-    def _merge_outside(curr_source: Tuple, next_source: Tuple, is_going_up: bool) -> Tuple:
-        if is_going_up:
-            return next_source._replace(low=curr_source.low)
+                return None
+
+            index.append(offset + start)
+            high_index.append(offset + start)
+            low_index.append(offset + start)
+            starts.append(offset + start)
+            curr_index = curr_start = curr_high_index = curr_low_index = offset + start + 1
+            start += 2
         else:
-            return next_source._replace(high=curr_source.high)
+            prev_high, prev_low, curr_high, curr_low = state.prev_high, state.prev_low, state.high, state.low
+            curr_index, curr_start = state.index, state.start
+            curr_high_index, curr_low_index = state.high_index, state.low_index
+            start = 0
+
+        for next_index in range(start, count):
+            next_high, next_low = next_highs[next_index], next_lows[next_index]
+            is_going_up = prev_high < curr_high and prev_low < curr_low
+
+            if curr_high >= next_high and curr_low <= next_low:
+                if is_going_up:
+                    curr_low, curr_low_index = next_low, offset + next_index
+                else:
+                    curr_high, curr_high_index = next_high, offset + next_index
+            elif curr_high <= next_high and curr_low >= next_low:
+                curr_index = offset + next_index
+                if is_going_up:
+                    curr_high, curr_high_index = next_high, offset + next_index
+                else:
+                    curr_low, curr_low_index = next_low, offset + next_index
+            else:
+                index.append(curr_index)
+                high_index.append(curr_high_index)
+                low_index.append(curr_low_index)
+                starts.append(curr_start)
+                prev_high, prev_low = curr_high, curr_low
+                curr_index = curr_start = curr_high_index = curr_low_index = offset + next_index
+                curr_high, curr_low = next_high, next_low
+
+        state.count += len(index)
+        state.index, state.start = curr_index, curr_start
+        state.high_index, state.low_index = curr_high_index, curr_low_index
+        state.high, state.low, state.prev_high, state.prev_low = curr_high, curr_low, prev_high, prev_low
+
+        index.append(curr_index)
+        high_index.append(curr_high_index)
+        low_index.append(curr_low_index)
+        starts.append(curr_start)
+        return index, high_index, low_index, starts
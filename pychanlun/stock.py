@@ -1,68 +1,444 @@
-from typing import Dict, Optional, List, Tuple
+import threading
+import time
+import tracemalloc
+from bisect import bisect_left
+from collections import namedtuple
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Dict, Optional, List, Tuple, Any, Callable, Iterator, Sequence, Type, Union
 
 import numpy as np
 import pandas as pd
+from pychanlun.cache import LayerCache
+from pychanlun.indicator import BollingerBands, Indicator, Macd, MovingAverage, rolling_moments
+from pychanlun.mapped import MappedSource
+
+
+ITEM_DTYPE = np.dtype([('position', np.int64), ('high', np.float64), ('low', np.float64)])
+
+ItemRow = namedtuple('ItemRow', ['position', 'high', 'low'])
+
+
+@dataclass
+class Checkpoint:
+    index: int
+    size: int
+    reach: int
+
+
+@dataclass
+class SourceState:
+    ema_fast: float = np.nan
+    ema_slow: float = np.nan
+    macd_dea: float = np.nan
+    pending: int = 0
+
+
+@dataclass
+class Revision:
+    items: Optional[np.ndarray]
+    start: int
+    saved: List[np.ndarray] = field(default_factory=list)
+
+
+@dataclass
+class StageStats:
+    seconds: float
+    input_rows: int
+    output_rows: int
+    allocated_bytes: Optional[int] = None
+
+
+class Layer(dict):
+
+    def __init__(self, process: Callable[[str], Any], source: Optional[str] = None):
+        super().__init__()
+        self.source = source
+        self._process = process
+        self._observer: Optional[Callable[['Layer', str], Any]] = None
+        self._stale: Dict[str, Any] = {}
+        self._lock: Optional[Callable[[str], threading.RLock]] = None
+
+    def __missing__(self, interval: str) -> Any:
+        if self._lock is None:
+            return self._fill(interval)
+        with self._lock(interval):
+            return dict.__getitem__(self, interval) if interval in self else self._fill(interval)
+
+    def _fill(self, interval: str) -> Any:
+        value = self._process(interval) if self._observer is None else self._observer(self, interval)
+        self._stale.pop(interval, None)
+        self[interval] = value
+        return value
+
+    def invalidate(self, interval: str) -> None:
+        if interval in self:
+            self._stale[interval] = self.pop(interval)
+
+    def stale(self, interval: str) -> Any:
+        return self._stale.get(interval)
+
+    def compute(self, interval: str) -> Any:
+        return self._process(interval)
+
+    def observe(self, observer: Optional[Callable[['Layer', str], Any]]) -> None:
+        self._observer = observer
+
+    def guard(self, lock: Optional[Callable[[str], threading.RLock]]) -> None:
+        self._lock = lock
+
+    @property
+    def observed(self) -> bool:
+        return self._observer is not None
 
 
 class Stock:
     MA_PERIODS = (5, 10, 20, 30, 60, 120, 250)
+    STATE_TYPES: Tuple[type, ...] = (Checkpoint, SourceState)
+    REQUIRED_INDICATORS: Tuple[Type[Indicator], ...] = ()
+    MIN_CAPACITY = 64
     MACD_FAST, MACD_SLOW, MACD_SIGNAL = 12, 26, 9
     BB_PERIOD, BB_K = 20, 2
 
-    def __init__(self, symbol: str, sources: Dict[str, pd.DataFrame]):
+    def __init__(self, symbol: str, sources: Dict[str, Union[pd.DataFrame, MappedSource]], executor: Optional[Executor] = None,
+                 cache: Optional[LayerCache] = None, inplace: bool = True,
+                 indicators: Optional[Sequence[Indicator]] = None):
         self.symbol = symbol
-        self.sources = sources
-        self._process_all_intervals()
+        self.inplace = inplace
+        self.indicators: Tuple[Indicator, ...] = self._default_indicators() if indicators is None else tuple(indicators)
+        columns = [column for indicator in self.indicators for column in indicator.columns]
+        if len(set(columns)) != len(columns):
+            raise ValueError(f"Duplicate indicator columns: {columns}")
+        missing = [
+            required.__name__ for required in self.REQUIRED_INDICATORS
+            if not any(isinstance(indicator, required) for indicator in self.indicators)
+        ]
+        if missing:
+            raise ValueError(f"Indicator plan must include {missing}, got {list(self.indicators)}")
+        self.sources: Dict[str, Optional[pd.DataFrame]] = Layer(self._compute_sources)
+        self._raw_sources = sources if inplace else dict(sources)
+        self._indicators: Dict[str, Dict[str, np.ndarray]] = {}
+        self._changes: Dict[str, Dict[str, Dict[str, int]]] = {}
+        self._source_states: Dict[str, SourceState] = {}
+        self._buffers: Dict[Tuple[Any, ...], np.ndarray] = {}
+        self._consumed: Dict[Tuple[str, str], Dict[str, Revision]] = {}
+        self._stats: Dict[str, Dict[str, StageStats]] = {}
+        self._stats_callback: Optional[Callable[[str, str, StageStats], None]] = None
+        self._cache = cache
+        self._locks: Dict[str, threading.RLock] = {}
+        for layer in vars(self).values():
+            if isinstance(layer, Layer):
+                layer.guard(self._lock)
 
-    def _process_all_intervals(self) -> None:
-        for interval in self.sources.keys():
-            self._process_interval(interval)
+        intervals = list(sources.keys())
+        if cache is not None:
+            intervals = [interval for interval in intervals if not self._restore_interval(interval)]
+        if executor is not None:
+            self._process_all_intervals(executor, intervals)
+        if cache is not None:
+            for interval in intervals:
+                self._store_interval(interval)
 
-    def _process_interval(self, interval: str) -> None:
-        source_df = self.sources[interval]
+    def __getstate__(self) -> Dict[str, Any]:
+        return {**vars(self), '_locks': {}}
+
+    def update(self, interval: str, bars: pd.DataFrame) -> None:
+        with self._lock(interval):
+            source_df = self.sources[interval] if interval in self._raw_sources else None
+            state = self._source_states.get(interval)
+            if state is None:
+                self._raw_sources[interval] = bars
+                self.sources.pop(interval, None)
+            else:
+                extend = partial(self._extend_sources, interval, source_df, bars, state, self._indicators.get(interval))
+                measured = self.sources.observed
+                self.sources[interval] = self._measure('sources', interval, bars, extend) if measured else extend()
+            self._invalidate_interval(interval)
+
+    def instrument(self, callback: Optional[Callable[[str, str, StageStats], None]] = None,
+                   enabled: bool = True) -> None:
+        self._stats_callback = callback if enabled else None
+        for name, layer in vars(self).items():
+            if isinstance(layer, Layer):
+                layer.observe(partial(self._record_stage, name) if enabled else None)
+
+    def stats(self, interval: str) -> Dict[str, StageStats]:
+        return dict(self._stats.get(interval, {}))
+
+    def _record_stage(self, name: str, layer: Layer, interval: str) -> Any:
+        inputs = self._raw_sources[interval] if layer.source is None else self._stage_input(layer.source, interval)
+        return self._measure(name, interval, inputs, partial(layer.compute, interval))
+
+    def _measure(self, name: str, interval: str, inputs: Any, compute: Callable[[], Any]) -> Any:
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            allocated = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+
+        start = time.perf_counter()
+        value = compute()
+        seconds = time.perf_counter() - start
+
+        stats = StageStats(
+            seconds=seconds,
+            input_rows=0 if inputs is None else len(inputs),
+            output_rows=0 if value is None else len(value),
+            allocated_bytes=tracemalloc.get_traced_memory()[1] - allocated if tracing else None
+        )
+        self._stats.setdefault(interval, {})[name] = stats
+        if self._stats_callback is not None:
+            self._stats_callback(interval, name, stats)
+        return value
+
+    def _stage_input(self, source: str, interval: str) -> Any:
+        return self._bars(interval) if source == 'sources' else getattr(self, source)[interval]
+
+    def _process_all_intervals(self, executor: Optional[Executor] = None, intervals: Optional[List[str]] = None) -> None:
+        intervals = list(self._raw_sources.keys()) if intervals is None else intervals
+        if executor is None:
+            for interval in intervals:
+                self._process_interval(interval)
+            return
+
+        futures = {
+            interval: executor.submit(_process_detached_interval, type(self), self.symbol, interval,
+                                      self._raw_sources[interval], self.inplace, self.indicators)
+            for interval in intervals
+        }
+        for interval, future in futures.items():
+            self._attach_interval(interval, future.result())
+            self._adopt_interval(interval)
+
+    def _detach_interval(self, interval: str) -> Dict[str, Any]:
+        return {
+            name: value[interval] for name, value in vars(self).items()
+            if name not in ('_raw_sources', '_locks') and isinstance(value, dict) and interval in value
+        }
+
+    def _attach_interval(self, interval: str, values: Dict[str, Any]) -> None:
+        for name, value in values.items():
+            getattr(self, name)[interval] = value
+
+    def _restore_interval(self, interval: str) -> bool:
+        source_df = self._raw_sources[interval]
+        if source_df is None or source_df.empty:
+            return False
+
+        cached = self._cache.load(self._cache.series(self, interval), source_df, self.STATE_TYPES)
+        if cached is None:
+            return False
+
+        size, values = cached
+        self._attach_interval(interval, values)
+        if size < len(source_df):
+            self.update(interval, source_df.to_frame(size) if isinstance(source_df, MappedSource) else source_df.iloc[size:])
+            self._store_interval(interval)
+        self._adopt_interval(interval)
+        return True
+
+    def _adopt_interval(self, interval: str) -> None:
+        source_df, sources = self._raw_sources[interval], self.sources.get(interval)
+        if self.inplace and isinstance(source_df, pd.DataFrame) and sources is not None and sources is not source_df:
+            self.sources[interval] = self._adopt_sources(source_df, sources)
+
+    def _adopt_sources(self, df: pd.DataFrame, source_df: pd.DataFrame) -> pd.DataFrame:
+        df = self._normalize_sources(df)
+        for column in (column for indicator in self.indicators for column in indicator.columns):
+            df[column] = source_df[column].to_numpy().copy()
+        return df
+
+    def _store_interval(self, interval: str) -> None:
+        source_df = self._raw_sources[interval]
         if source_df is None or source_df.empty:
             return
 
+        self._process_interval(interval)
+        values = self._detach_interval(interval)
+        values.pop('_stats', None)
+        self._cache.store(self._cache.series(self, interval), source_df, values)
+
+    def _lock(self, interval: str) -> threading.RLock:
+        lock = self._locks.get(interval)
+        return self._locks.setdefault(interval, threading.RLock()) if lock is None else lock
+
+    def _process_interval(self, interval: str) -> None:
+        self.sources[interval]
+
+    def _invalidate_interval(self, interval: str) -> None:
+        pass
+
+    def _bars(self, interval: str) -> Union[pd.DataFrame, MappedSource, None]:
+        source = self._raw_sources[interval]
+        if isinstance(source, MappedSource) and interval not in self.sources:
+            return source
+        return self.sources[interval]
+
+    def _compute_sources(self, interval: str) -> Optional[pd.DataFrame]:
+        source_df = self._raw_sources[interval]
+        self._indicators.pop(interval, None)
+        if isinstance(source_df, MappedSource) and self.inplace:
+            source_df = source_df.to_frame()
+        if source_df is None or source_df.empty:
+            self._source_states.pop(interval, None)
+            return source_df
+
+        state = SourceState()
         source_df = self._normalize_sources(source_df)
-        source_df = self._add_source_moving_averages(source_df)
-        source_df = self._add_source_macd(source_df)
-        source_df = self._add_source_bollinger_bands(source_df)
-        self.sources[interval] = source_df
+        if self.inplace:
+            close = source_df['close'].to_numpy(dtype=float)
+            for column, values in self._calculate_indicators(close, self.indicators, state).items():
+                source_df[column] = values
+        self._source_states[interval] = state
+        return source_df
+
+    def _get_indicators(self, interval: str, columns: Sequence[str]) -> Optional[Dict[str, np.ndarray]]:
+        source_df = self.sources[interval]
+        if source_df is None or source_df.empty:
+            return None
+        if self.inplace:
+            return {column: source_df[column].to_numpy() for column in columns}
+
+        planned = {column: indicator for indicator in self.indicators for column in indicator.columns}
+        missing = [column for column in columns if column not in planned]
+        if missing:
+            raise KeyError(f"Indicators not in the plan: {missing}")
+
+        indicators = self._indicators.setdefault(interval, {})
+        pending = list(dict.fromkeys(planned[column] for column in columns if column not in indicators))
+        if pending:
+            close = source_df['close'].to_numpy(dtype=float)
+            indicators.update(self._calculate_indicators(close, pending, self._source_states[interval]))
+        return {column: indicators[column] for column in columns}
+
+    def _default_indicators(self) -> Tuple[Indicator, ...]:
+        return (
+            *(MovingAverage(window) for window in self.MA_PERIODS),
+            Macd(self.MACD_FAST, self.MACD_SLOW, self.MACD_SIGNAL),
+            BollingerBands(self.BB_PERIOD, self.BB_K)
+        )
 
     @staticmethod
-    def _normalize_sources(df: pd.DataFrame) -> pd.DataFrame:
-        df.columns = df.columns.str.lower()
+    def _rolling_windows(indicators: Sequence[Indicator]) -> Tuple[List[int], List[int]]:
+        averages = [indicator.window for indicator in indicators if isinstance(indicator, MovingAverage)]
+        bands = [indicator.period for indicator in indicators if isinstance(indicator, BollingerBands)]
+        return averages, bands
+
+    def _calculate_indicators(self, close: np.ndarray, indicators: Sequence[Indicator], state: SourceState,
+                              context: int = 0) -> Dict[str, np.ndarray]:
+        averages, bands = self._rolling_windows(indicators)
+        moments = rolling_moments(close, averages + bands, bands)
+
+        columns = {}
+        for indicator in indicators:
+            if isinstance(indicator, MovingAverage):
+                columns[indicator.columns[0]] = moments[indicator.window][0][context:]
+            elif isinstance(indicator, BollingerBands):
+                mean, std = (values[context:] for values in moments[indicator.period])
+                columns.update(zip(indicator.columns, (mean, mean + indicator.k * std, mean - indicator.k * std)))
+            else:
+                columns.update(zip(indicator.columns, self._calculate_macd(close[context:], indicator, state)))
+        return columns
+
+    def _extend_sources(self, interval: str, source_df: pd.DataFrame, bars: pd.DataFrame, state: SourceState,
+                        indicators: Optional[Dict[str, np.ndarray]] = None) -> pd.DataFrame:
+        bars = self._normalize_sources(bars)
+        if bars.empty:
+            return source_df
+
+        if not bars.index.is_monotonic_increasing or not bars.index.is_unique or bars.index[0] <= source_df.index[-1]:
+            raise ValueError(f"Bars must be unique, sorted and later than {source_df.index[-1]}")
+
+        context = max(sum(self._rolling_windows(self.indicators), []), default=1) - 1
+        history = source_df['close'].to_numpy()[max(len(source_df) - context, 0):].astype(float)
+        close = np.concatenate((history, bars['close'].to_numpy(dtype=float)))
+        context = len(close) - len(bars)
+
+        if not self.inplace:
+            if indicators:
+                pending = [indicator for indicator in self.indicators if indicator.columns[0] in indicators]
+                for column, values in self._calculate_indicators(close, pending, state, context).items():
+                    items = indicators[column]
+                    indicators[column] = self._append((interval, 'indicators', column), items, len(items), values)
+            return self._append_frame(interval, source_df, bars)
+
+        df = bars.assign(**self._calculate_indicators(close, self.indicators, state, context))
+        return self._append_frame(interval, source_df, df.reindex(columns=source_df.columns))
+
+    def _append_frame(self, interval: str, source_df: pd.DataFrame, bars: pd.DataFrame) -> pd.DataFrame:
+        dtypes = [*source_df.dtypes, *bars.dtypes]
+        if (not isinstance(source_df.index, pd.DatetimeIndex) or not source_df.columns.is_unique
+                or not source_df.columns.equals(bars.columns) or source_df.index.dtype != bars.index.dtype
+                or not all(isinstance(dtype, np.dtype) for dtype in dtypes)):
+            return pd.concat([source_df, bars])
+
+        size = len(source_df)
+        index = self._append((interval, 'index'), source_df.index.asi8, size, bars.index.asi8)
+        columns = {
+            column: self._append((interval, 'sources', column), source_df[column].to_numpy(), size,
+                                 bars[column].to_numpy())
+            for column in source_df.columns
+        }
+        index = pd.DatetimeIndex(index, dtype=source_df.index.dtype, name=source_df.index.name, copy=False)
+        return pd.DataFrame(columns, index=index, copy=False)
+
+    def _append(self, key: Tuple[Any, ...], items: Optional[np.ndarray], size: int, tail: np.ndarray) -> np.ndarray:
+        buffer = self._buffers.get(key)
+        length = size + len(tail)
+        dtype = tail.dtype if items is None or size == 0 else np.result_type(items.dtype, tail.dtype)
+        if size == 0 and tail.base is None:
+            buffer = self._buffers[key] = tail
+        elif (buffer is None or items is None or items.base is not buffer or len(buffer) < length
+              or buffer.dtype != dtype):
+            buffer = self._buffers[key] = np.empty(max(length + length // 2, self.MIN_CAPACITY), dtype=dtype)
+            buffer[:size] = items[:size]
+        buffer[size:length] = tail
+        return buffer[:length]
+
+    def _normalize_sources(self, df: Union[pd.DataFrame, MappedSource]) -> pd.DataFrame:
+        columns = {str(col).lower(): col for col in df.columns}
 
         required = ['open', 'high', 'low', 'close', 'volume']
-        missing = [col for col in required if col not in df.columns]
+        missing = [col for col in required if col not in columns]
         if missing:
             raise ValueError(f"Missing required columns: {missing}")
 
         if not isinstance(df.index, pd.DatetimeIndex):
             raise ValueError(f"DataFrame index must be DatetimeIndex, got {type(df.index).__name__}")
 
+        if not self.inplace:
+            return pd.DataFrame({col: np.asarray(df[columns[col]]) for col in required},
+                                index=df.index.rename('datetime'), copy=False)
+
+        df.columns = df.columns.str.lower()
         df.index.name = 'datetime'
         return df
 
-    def _add_source_moving_averages(self, df: pd.DataFrame) -> pd.DataFrame:
-        for window in self.MA_PERIODS:
-            df[f'ma{window}'] = df['close'].rolling(window=window).mean()
-        return df
+    def _calculate_macd(self, close: np.ndarray, macd: Macd,
+                        state: SourceState) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        ema_fast = self._resume_ewm(close, macd.fast, state.ema_fast, state.pending)
+        ema_slow = self._resume_ewm(close, macd.slow, state.ema_slow, state.pending)
+        macd_line = ema_fast - ema_slow
+        macd_dea = self._resume_ewm(macd_line, macd.signal, state.macd_dea, 0)
 
-    def _add_source_macd(self, df: pd.DataFrame) -> pd.DataFrame:
-        ema_fast = df['close'].ewm(span=self.MACD_FAST, adjust=False).mean()
-        ema_slow = df['close'].ewm(span=self.MACD_SLOW, adjust=False).mean()
-        df['macd'] = ema_fast - ema_slow
-        df['macd_dea'] = df['macd'].ewm(span=self.MACD_SIGNAL, adjust=False).mean()
-        df['macd_dif'] = df['macd'] - df['macd_dea']
-        return df
+        observed = np.flatnonzero(~np.isnan(close))
+        if len(observed) > 0:
+            state.ema_fast = ema_fast[observed[-1]]
+            state.ema_slow = ema_slow[observed[-1]]
+            state.pending = int(len(close) - 1 - observed[-1])
+        else:
+            state.pending += len(close)
+        state.macd_dea = macd_dea[-1]
+        return macd_line, macd_dea, macd_line - macd_dea
 
-    def _add_source_bollinger_bands(self, df: pd.DataFrame) -> pd.DataFrame:
-        df['bb'] = df['close'].rolling(window=self.BB_PERIOD).mean()
-        rolling_std = df['close'].rolling(window=self.BB_PERIOD).std()
-        df['bb_upper'] = df['bb'] + (self.BB_K * rolling_std)
-        df['bb_lower'] = df['bb'] - (self.BB_K * rolling_std)
-        return df
+    @staticmethod
+    def _resume_ewm(values: np.ndarray, span: int, last: float, pending: int) -> np.ndarray:
+        if np.isnan(last):
+            return pd.Series(values).ewm(span=span, adjust=False).mean().to_numpy()
+
+        head = np.concatenate(([last], np.full(pending, np.nan)))
+        ewm = pd.Series(np.concatenate((head, values))).ewm(span=span, adjust=False).mean()
+        return ewm.to_numpy()[len(head):]
 
     @staticmethod
     def is_top(item: Tuple) -> bool:
@@ -72,11 +448,53 @@ class Stock:
     def is_bottom(item: Tuple) -> bool:
         return np.isnan(item.high) and not np.isnan(item.low)
 
+    def _mark_changed(self, interval: str, layer: str, changed: int) -> None:
+        consumers = self._changes.setdefault(interval, {}).setdefault(layer, {})
+        for consumer, pending in consumers.items():
+            consumers[consumer] = min(pending, changed)
+
+    def _take_changed(self, interval: str, layer: str, consumer: str, size: int) -> int:
+        consumers = self._changes.setdefault(interval, {}).setdefault(layer, {})
+        changed = consumers.get(consumer, 0)
+        consumers[consumer] = size
+        return changed
+
+    @staticmethod
+    def _find_checkpoint(checkpoints: List[Checkpoint], changed: int) -> Checkpoint:
+        index = bisect_left(checkpoints, changed, key=lambda checkpoint: checkpoint.reach) - 1
+        del checkpoints[index + 1:]
+        return checkpoints[index]
+
+    def _splice(self, interval: str, layer: str, size: int, tail: Optional[np.ndarray]) -> Optional[np.ndarray]:
+        items = getattr(self, layer).stale(interval)
+        self._save_revisions(interval, layer, size)
+        if items is None or size == 0:
+            return None if tail is None else self._append((interval, layer), None, 0, tail)
+        if tail is None:
+            return items[:size]
+        return self._append((interval, layer), items, size, tail)
+
+    def _save_revisions(self, interval: str, layer: str, size: int) -> None:
+        for revision in self._consumed.get((interval, layer), {}).values():
+            if revision.items is not None and size < revision.start:
+                revision.saved.append(revision.items[size:revision.start].copy())
+                revision.start = size
+
     @staticmethod
-    def to_dataframe(rows: List, columns: Optional[list] = None) -> Optional[pd.DataFrame]:
+    def to_rows(items: np.ndarray, row: Type[Tuple] = ItemRow) -> Iterator[Tuple]:
+        return map(row._make, items.tolist())
+
+    @staticmethod
+    def to_items(rows: List, dtype: np.dtype = ITEM_DTYPE) -> Optional[np.ndarray]:
         if not rows:
             return None
 
-        df = pd.DataFrame(rows).set_index('Index')
-        df.index.name = 'datetime'
-        return df if columns is None else df[columns]
+        return np.array(rows, dtype=dtype)
+
+
+def _process_detached_interval(cls: type, symbol: str, interval: str, source_df: pd.DataFrame,
+                               inplace: bool = True, indicators: Optional[Sequence[Indicator]] = None) -> Dict[str, Any]:
+    stock = cls(symbol, {interval: source_df}, inplace=inplace, indicators=indicators)
+    stock.instrument()
+    stock._process_interval(interval)
+    return stock._detach_interval(interval)
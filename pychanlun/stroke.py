@@ -1,105 +1,94 @@
+from concurrent.futures import Executor
 from dataclasses import dataclass
-from typing import Dict, Optional, Any, List
+from typing import Dict, Optional, List, Sequence
 
+import numpy as np
 import pandas as pd
 
+from pychanlun.cache import LayerCache
+from pychanlun.indicator import Indicator
 from pychanlun.fractal import Fractal
+from pychanlun.stock import Checkpoint, Layer
 
 
 @dataclass
-class Item:
-    index: int
-    item: Any
+class StrokeState:
+    highs: List[float]
+    lows: List[float]
+    tops: List[bool]
+    count: int = 0
+    first: int = -1
 
 
 class Stroke(Fractal):
     MIN_LENGTH = 4
 
-    def __init__(self, symbol: str, source: Dict[str, pd.DataFrame]):
-        self.strokes: Dict[str, Optional[pd.DataFrame]] = {}
-        super().__init__(symbol, source)
+    def __init__(self, symbol: str, source: Dict[str, pd.DataFrame], executor: Optional[Executor] = None,
+                 cache: Optional[LayerCache] = None, inplace: bool = True,
+                 indicators: Optional[Sequence[Indicator]] = None):
+        self.strokes: Dict[str, Optional[np.ndarray]] = Layer(self._compute_strokes, 'fractals')
+        self._stroke_checkpoints: Dict[str, List[Checkpoint]] = {}
+        super().__init__(symbol, source, executor, cache, inplace, indicators)
 
     def _process_interval(self, interval: str) -> None:
         super()._process_interval(interval)
+        self.strokes[interval]
+
+    def _invalidate_interval(self, interval: str) -> None:
+        super()._invalidate_interval(interval)
+        self.strokes.invalidate(interval)
+
+    def _compute_strokes(self, interval: str) -> Optional[np.ndarray]:
+        fractals = self.fractals[interval]
+        if fractals is None or len(fractals) == 0:
+            self._stroke_checkpoints.pop(interval, None)
+            self._mark_changed(interval, 'strokes', 0)
+            return None
+
+        checkpoints = self._stroke_checkpoints.setdefault(interval, [Checkpoint(0, 0, -1)])
+        changed = self._take_changed(interval, 'fractals', 'strokes', len(fractals))
+        checkpoint = self._find_checkpoint(checkpoints, changed)
+
+        strokes = self._form_strokes(fractals, checkpoints, checkpoint)
+        self._mark_changed(interval, 'strokes', checkpoint.size)
+        return self._splice(interval, 'strokes', checkpoint.size, strokes)
+
+    def _form_strokes(self, fractals: np.ndarray, checkpoints: List[Checkpoint],
+                      checkpoint: Checkpoint) -> Optional[np.ndarray]:
+        items = fractals[checkpoint.index:]
+        has_high, has_low = ~np.isnan(items['high']), ~np.isnan(items['low'])
+        state = StrokeState(items['high'].tolist(), items['low'].tolist(), (has_high & ~has_low).tolist())
+        rows, last = [], len(items) - 1
+
+        for offset in np.flatnonzero(has_high != has_low).tolist():
+            self._advance_stroke(state, rows, offset, offset == last)
+            index = checkpoint.index + offset
+            if offset == last:
+                rows.append(offset)
+            elif state.count == 1 and index > checkpoints[-1].index:
+                checkpoints.append(Checkpoint(index, checkpoint.size + len(rows), index - 1))
+
+        return items[rows] if rows else None
+
+    def _advance_stroke(self, state: StrokeState, rows: List[int], offset: int, is_last_fractal: bool) -> None:
+        state.count += 1
+        if state.count == 1:
+            state.first = offset
+            return
 
-        fractal_df = self.fractals[interval]
-        if fractal_df is None or fractal_df.empty:
-            self.strokes[interval] = None
+        if state.count % 2 == 0:
+            if state.count < 6 and not is_last_fractal and not self._is_valid_stroke(state.first, offset):
+                return
+            rows.append(state.first)
+        elif not is_last_fractal and not self._can_extend_stroke(state, state.first, offset):
             return
+        state.first, state.count = offset, 1
 
-        fractals = list(fractal_df.itertuples())
-
-        stroke_df = self._form_strokes(fractals)
-        self.strokes[interval] = stroke_df
-
-    def _form_strokes(self, fractals: List) -> Optional[pd.DataFrame]:
-        rows, temps = [], []
-
-        for index, fractal in enumerate(fractals):
-            if not self.is_top(fractal) and not self.is_bottom(fractal):
-                continue
-
-            temps.append(Item(index, fractal))
-
-            is_last_fractal = index == len(fractals) - 1
-            temps = self._process_fractals(rows, temps, is_last_fractal)
-            if is_last_fractal:
-                rows.append(fractal)
-
-        return self.to_dataframe(rows, ['high', 'low'])
-
-    def _process_fractals(self, rows: List, temps: List[Item], is_last_fractal: bool) -> List[Item]:
-        count = len(temps)
-        if count == 2:
-            return self._handle_two_fractals(rows, temps, is_last_fractal)
-        elif count == 3:
-            return self._handle_three_fractals(temps, is_last_fractal)
-        elif count == 4:
-            return self._handle_four_fractals(rows, temps, is_last_fractal)
-        elif count == 5:
-            return self._handle_five_fractals(temps, is_last_fractal)
-        elif count == 6:
-            return self._handle_six_fractals(rows, temps)
-        return temps
-
-    def _handle_two_fractals(self, rows: List, temps: List[Item], is_last_fractal: bool) -> List[Item]:
-        curr_fractal, next_fractal = temps[0], temps[1]
-        if is_last_fractal or self._is_valid_stroke(curr_fractal, next_fractal):
-            rows.append(curr_fractal.item)
-            return [next_fractal]
-        return temps
-
-    def _handle_three_fractals(self, temps: List[Item], is_last_fractal: bool) -> List[Item]:
-        curr_fractal, next_fractal = temps[0], temps[2]
-        if is_last_fractal or self._can_extend_stroke(curr_fractal, next_fractal):
-            return [next_fractal]
-        return temps
-
-    def _handle_four_fractals(self, rows: List, temps: List[Item], is_last_fractal: bool) -> List[Item]:
-        curr_fractal, next_fractal = temps[0], temps[3]
-        if is_last_fractal or self._is_valid_stroke(curr_fractal, next_fractal):
-            rows.append(curr_fractal.item)
-            return [next_fractal]
-        return temps
-
-    def _handle_five_fractals(self, temps: List[Item], is_last_fractal: bool) -> List[Item]:
-        curr_fractal, next_fractal = temps[0], temps[4]
-        if is_last_fractal or self._can_extend_stroke(curr_fractal, next_fractal):
-            return [next_fractal]
-        return temps
+    def _is_valid_stroke(self, curr_fractal: int, next_fractal: int) -> bool:
+        return next_fractal - curr_fractal >= self.MIN_LENGTH
 
     @staticmethod
-    def _handle_six_fractals(rows: List, temps: List[Item]) -> List[Item]:
-        curr_fractal, next_fractal = temps[0], temps[5]
-        rows.append(curr_fractal.item)
-        return [next_fractal]
-
-    def _is_valid_stroke(self, curr_fractal: Item, next_fractal: Item) -> bool:
-        return next_fractal.index - curr_fractal.index >= self.MIN_LENGTH
-
-    def _can_extend_stroke(self, curr_fractal: Item, next_fractal: Item) -> bool:
-        if self.is_top(curr_fractal.item):
-            return next_fractal.item.high >= curr_fractal.item.high
-        elif self.is_bottom(curr_fractal.item):
-            return next_fractal.item.low <= curr_fractal.item.low
-        return False
+    def _can_extend_stroke(state: StrokeState, curr_fractal: int, next_fractal: int) -> bool:
+        if state.tops[curr_fractal]:
+            return state.highs[next_fractal] >= state.highs[curr_fractal]
+        return state.lows[next_fractal] <= state.lows[curr_fractal]
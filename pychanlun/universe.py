@@ -0,0 +1,227 @@
+import os
+from concurrent.futures import BrokenExecutor, Executor, Future, ProcessPoolExecutor, FIRST_COMPLETED, wait
+from multiprocessing import shared_memory
+from typing import Dict, Optional, List, Tuple, Any, Callable, Iterable, Mapping, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from pychanlun.chan import Chan
+
+Columns = Dict[str, Any]
+Layout = Dict[str, Tuple[Optional[str], List[Tuple[str, str, int, int]]]]
+
+COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+LAYERS = (
+    'fractals', 'strokes', 'stroke_pivots', 'stroke_pivot_trends', 'stroke_pivot_signals',
+    'segments', 'segment_pivots', 'segment_pivot_trends', 'segment_pivot_signals'
+)
+
+
+class ChanUniverse:
+
+    def __init__(self, sources: Union[Mapping[str, Dict[str, pd.DataFrame]], Callable[[str], Dict[str, pd.DataFrame]]],
+                 symbols: Optional[Iterable[str]] = None, layers: Sequence[str] = LAYERS,
+                 executor: Optional[Executor] = None, max_workers: Optional[int] = None,
+                 progress: Optional[Callable[[int, int, str], None]] = None):
+        if callable(sources):
+            if symbols is None:
+                raise ValueError("Symbols are required when sources is a loader")
+            self._loader, self._sources = sources, None
+        else:
+            self._loader, self._sources = None, sources
+        self.symbols: List[str] = list(sources.keys() if symbols is None else symbols)
+        self.layers = tuple(layers)
+        self.results: Dict[str, Dict[str, Dict[str, Optional[Columns]]]] = {}
+        self.errors: Dict[str, Exception] = {}
+        self._executor = executor
+        self._max_workers = max_workers
+        self._progress = progress
+        self._done = 0
+        self._progress_error: Optional[Exception] = None
+
+    def run(self) -> Dict[str, Dict[str, Dict[str, Optional[Columns]]]]:
+        self._execute(self.symbols)
+        return self.results
+
+    def get(self, symbol: str, interval: str, layer: str) -> Optional[pd.DataFrame]:
+        columns = self.results[symbol][interval][layer]
+        if columns is None:
+            return None
+
+        return pd.DataFrame({name: values for name, values in columns.items() if name != 'datetime'},
+                            index=columns['datetime'])
+
+    def _execute(self, symbols: List[str]) -> None:
+        workers = self._max_workers or os.cpu_count() or 1
+        self._done, self._progress_error = 0, None
+        if self._executor is not None:
+            self._run(self._executor, workers, symbols, False)
+        else:
+            while symbols:
+                with ProcessPoolExecutor(workers) as executor:
+                    suspects, symbols = self._run(executor, workers, symbols, True)
+                for symbol in suspects:
+                    with ProcessPoolExecutor(1) as executor:
+                        self._run(executor, 1, [symbol], False)
+
+        if self._progress_error is not None:
+            raise self._progress_error
+
+    def _run(self, executor: Executor, workers: int, symbols: List[str], retry: bool) -> Tuple[List[str], List[str]]:
+        queue = list(reversed(symbols))
+        pending: Dict[Future, Tuple[str, Optional[shared_memory.SharedMemory]]] = {}
+        suspects: List[str] = []
+        broken = False
+
+        try:
+            while True:
+                while not broken and queue and len(pending) < 2 * workers and self._admit(queue[-1], workers):
+                    symbol = queue.pop()
+                    try:
+                        future, memory = self._submit(executor, symbol)
+                    except BrokenExecutor as e:
+                        if retry:
+                            queue.append(symbol)
+                            broken = True
+                        else:
+                            self._fail(symbol, e)
+                        continue
+                    except Exception as e:
+                        self._fail(symbol, e)
+                        continue
+                    pending[future] = (symbol, memory)
+
+                if not pending:
+                    break
+
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    symbol, memory = pending.pop(future)
+                    _release(memory)
+                    try:
+                        result = future.result()
+                    except BrokenExecutor as e:
+                        if retry:
+                            suspects.append(symbol)
+                            broken = True
+                        else:
+                            self._fail(symbol, e)
+                        continue
+                    except Exception as e:
+                        self._fail(symbol, e)
+                        continue
+                    self._collect(symbol, result)
+        finally:
+            for _, memory in pending.values():
+                _release(memory)
+        return suspects, list(reversed(queue))
+
+    def _submit(self, executor: Executor, symbol: str) -> Tuple[Future, Optional[shared_memory.SharedMemory]]:
+        if self._loader is not None:
+            return executor.submit(*self._task(symbol, None)), None
+
+        memory, layout = _share_sources(self._sources[symbol])
+        try:
+            return executor.submit(*self._task(symbol, (memory.name, layout))), memory
+        except BaseException:
+            _release(memory)
+            raise
+
+    def _admit(self, symbol: str, workers: int) -> bool:
+        return True
+
+    def _task(self, symbol: str, shared: Optional[Tuple[str, Layout]]) -> Tuple[Any, ...]:
+        return _analyze_symbol, symbol, self._loader, shared, self.layers
+
+    def _collect(self, symbol: str, result: Dict[str, Dict[str, Optional[Columns]]]) -> None:
+        self.results[symbol] = result
+        self._report(symbol)
+
+    def _fail(self, symbol: str, error: Exception) -> None:
+        self.errors[symbol] = error
+        self._report(symbol)
+
+    def _report(self, symbol: str) -> None:
+        self._done += 1
+        if self._progress is None or self._progress_error is not None:
+            return
+
+        try:
+            self._progress(self._done, len(self.symbols), symbol)
+        except Exception as e:
+            self._progress_error = e
+
+
+def _release(memory: Optional[shared_memory.SharedMemory]) -> None:
+    if memory is not None:
+        memory.close()
+        memory.unlink()
+
+
+def _share_sources(sources: Dict[str, pd.DataFrame]) -> Tuple[shared_memory.SharedMemory, Layout]:
+    arrays, layout, offset = [], {}, 0
+    for interval, df in sources.items():
+        if df is None:
+            continue
+
+        columns = {str(column).lower(): column for column in df.columns}
+        missing = [column for column in COLUMNS if column not in columns]
+        if missing:
+            raise ValueError(f"Missing required columns: {missing}")
+        if not isinstance(df.index, pd.DatetimeIndex):
+            raise ValueError(f"DataFrame index must be DatetimeIndex, got {type(df.index).__name__}")
+
+        tz = None if df.index.tz is None else str(df.index.tz)
+        layout[interval] = (tz, [])
+        named = [('datetime', df.index.to_numpy() if tz is None else df.index.tz_convert(None).to_numpy())]
+        named += [(column, df[columns[column]].to_numpy()) for column in COLUMNS]
+        for name, values in named:
+            values = np.ascontiguousarray(values)
+            if values.dtype.hasobject:
+                raise ValueError(f"Column {name} of interval {interval} must be numeric")
+            layout[interval][1].append((name, values.dtype.str, offset, len(values)))
+            arrays.append((offset, values))
+            offset += values.nbytes
+
+    memory = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+    for start, values in arrays:
+        memory.buf[start:start + values.nbytes] = values.view(np.uint8)
+    return memory, layout
+
+
+def _attach_sources(name: str, layout: Layout) -> Dict[str, pd.DataFrame]:
+    memory = shared_memory.SharedMemory(name=name)
+    try:
+        sources = {}
+        for interval, (tz, columns) in layout.items():
+            values = {
+                column: np.ndarray(length, dtype=dtype, buffer=memory.buf, offset=offset).copy()
+                for column, dtype, offset, length in columns
+            }
+            index = pd.DatetimeIndex(values.pop('datetime'), name='datetime')
+            sources[interval] = pd.DataFrame(values, index=index if tz is None else index.tz_localize('UTC').tz_convert(tz))
+        return sources
+    finally:
+        memory.close()
+
+
+def _analyze_symbol(symbol: str, loader: Optional[Callable[[str], Dict[str, pd.DataFrame]]],
+                    shared: Optional[Tuple[str, Layout]], layers: Sequence[str]) -> Dict[str, Dict[str, Optional[Columns]]]:
+    sources = loader(symbol) if loader is not None else _attach_sources(*shared)
+    chan = Chan(symbol, sources)
+
+    results = {}
+    for interval in sources.keys():
+        results[interval] = {layer: _to_columns(getattr(chan, f'get_{layer}')(interval)) for layer in layers}
+    return results
+
+
+def _to_columns(df: Optional[pd.DataFrame]) -> Optional[Columns]:
+    if df is None:
+        return None
+
+    columns: Columns = {'datetime': df.index}
+    for column in df.columns:
+        columns[column] = df[column].to_numpy()
+    return columns
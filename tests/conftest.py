@@ -0,0 +1,59 @@
+import importlib.util
+import os
+
+import pandas as pd
+import pytest
+
+BENCHMARKS = os.path.join(os.path.dirname(__file__), os.pardir, 'benchmarks', 'chan-benchmarks.py')
+LAYERS = (
+    'sticks', 'fractals', 'strokes', 'segments', 'stroke_pivots', 'segment_pivots', 'stroke_signals',
+    'segment_signals', 'memberships'
+)
+
+
+def load_benchmarks():
+    spec = importlib.util.spec_from_file_location('chan_benchmarks', BENCHMARKS)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def is_rolling(column):
+    return column.startswith('bb') or (column.startswith('ma') and column[2:].isdigit())
+
+
+def assert_frame_matches(actual, expected, name):
+    rolling = [column for column in expected.columns if is_rolling(column)]
+    exact = [column for column in expected.columns if column not in rolling]
+    pd.testing.assert_frame_equal(actual[exact], expected[exact], check_exact=True, check_freq=False, obj=name)
+    pd.testing.assert_frame_equal(actual[rolling], expected[rolling], rtol=1e-9, check_freq=False, obj=name)
+
+
+@pytest.fixture(scope='session')
+def benchmarks():
+    return load_benchmarks()
+
+
+@pytest.fixture(scope='session')
+def generate_ohlcv(benchmarks):
+    return benchmarks.generate_ohlcv
+
+
+@pytest.fixture(scope='session')
+def assert_chan_equal(benchmarks):
+    def check(actual, expected, interval, layers=LAYERS):
+        for getter in benchmarks.GETTERS:
+            left, right = getattr(actual, getter)(interval), getattr(expected, getter)(interval)
+            if left is None or right is None:
+                assert left is None and right is None, getter
+            else:
+                assert_frame_matches(left, right, getter)
+
+        for layer in layers:
+            left, right = getattr(actual, layer)[interval], getattr(expected, layer)[interval]
+            if left is None or right is None:
+                assert left is None and right is None, layer
+            else:
+                assert left.dtype == right.dtype and left.tobytes() == right.tobytes(), layer
+
+    return check
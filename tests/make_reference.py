@@ -0,0 +1,43 @@
+import importlib.util
+import os
+import sys
+
+import numpy as np
+
+from pychanlun.chan import Chan
+
+DATASETS = ((0, 8000), (1, 3000))
+SOURCE_STRIDE = 10
+PATH = os.path.join(os.path.dirname(__file__), 'data', 'reference.npz')
+
+
+def load_benchmarks():
+    path = os.path.join(os.path.dirname(__file__), os.pardir, 'benchmarks', 'chan-benchmarks.py')
+    spec = importlib.util.spec_from_file_location('chan_benchmarks', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def to_array(values):
+    values = np.asarray(values)
+    return values.astype('datetime64[ns]').view(np.int64) if values.dtype.kind == 'M' else values
+
+
+def main(path):
+    benchmarks = load_benchmarks()
+    arrays = {}
+    for seed, bars in DATASETS:
+        chan = Chan('T', {'1m': benchmarks.generate_ohlcv(bars, seed)})
+        for getter in benchmarks.GETTERS:
+            df = getattr(chan, getter)('1m')
+            if getter == 'get_sources':
+                df = df.iloc[::SOURCE_STRIDE]
+            arrays[f'{seed}/{getter}/index'] = to_array(df.index)
+            for column in df.columns:
+                arrays[f'{seed}/{getter}/{column}'] = to_array(df[column])
+    np.savez_compressed(path, **arrays)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1] if len(sys.argv) > 1 else PATH)
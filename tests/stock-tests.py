@@ -13,57 +13,57 @@ def test_sources(stock, interval):
 def test_sticks(stock, interval):
     stick = stock.sticks[interval]
     print(f'********** Sticks[\'{interval}\']: {len(stick)} **********')
-    print(stick.head())
-    print(stick.columns.values.tolist())
+    print(stick[:5])
+    print(list(stick.dtype.names))
 
 
 def test_fractals(stock, interval):
     fractal = stock.fractals[interval]
     print(f'********** Fractals[\'{interval}\']: {len(fractal)} **********')
-    print(fractal.head())
-    print(fractal.columns.values.tolist())
+    print(fractal[:5])
+    print(list(fractal.dtype.names))
 
 
 def test_strokes(stock, interval):
     stroke = stock.strokes[interval]
     print(f'********** Strokes[\'{interval}\']: {len(stroke)} **********')
-    print(stroke.head())
-    print(stroke.columns.values.tolist())
+    print(stroke[:5])
+    print(list(stroke.dtype.names))
 
 
 def test_stroke_pivots(stock, interval):
     stroke_pivot = stock.stroke_pivots[interval]
     print(f'********** Stroke Pivots[\'{interval}\']: {len(stroke_pivot)} **********')
-    print(stroke_pivot.head())
-    print(stroke_pivot.columns.values.tolist())
+    print(stroke_pivot[:5])
+    print(list(stroke_pivot.dtype.names))
 
 
 def test_stroke_signals(stock, interval):
     stroke_signal = stock.stroke_signals[interval]
     print(f'********** Stroke Signals[\'{interval}\']: {len(stroke_signal)} **********')
-    print(stroke_signal.head())
-    print(stroke_signal.columns.values.tolist())
+    print(stroke_signal[:5])
+    print(list(stroke_signal.dtype.names))
 
 
 def test_segments(stock, interval):
     segment = stock.segments[interval]
     print(f'********** Segments[\'{interval}\']: {len(segment)} **********')
-    print(segment.head())
-    print(segment.columns.values.tolist())
+    print(segment[:5])
+    print(list(segment.dtype.names))
 
 
 def test_segment_pivots(stock, interval):
     segment_pivot = stock.segment_pivots[interval]
     print(f'********** Segment Pivots[\'{interval}\']: {len(segment_pivot)} **********')
-    print(segment_pivot.head())
-    print(segment_pivot.columns.values.tolist())
+    print(segment_pivot[:5])
+    print(list(segment_pivot.dtype.names))
 
 
 def test_segment_signals(stock, interval):
     segment_signal = stock.segment_signals[interval]
     print(f'********** Segment Signals[\'{interval}\']: {len(segment_signal)} **********')
-    print(segment_signal.head())
-    print(segment_signal.columns.values.tolist())
+    print(segment_signal[:5])
+    print(list(segment_signal.dtype.names))
 
 if __name__ == '__main__':
     try:
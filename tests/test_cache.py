@@ -0,0 +1,65 @@
+import json
+
+import pandas as pd
+import pytest
+
+from pychanlun.cache import LayerCache
+from pychanlun.chan import Chan
+
+
+@pytest.mark.parametrize('inplace', (True, False))
+def test_cache_hit_matches_rebuild(tmp_path, generate_ohlcv, assert_chan_equal, inplace):
+    df = generate_ohlcv(4000, 7)
+    cache = LayerCache(str(tmp_path))
+    expected = Chan('T', {'1m': df.copy()}, inplace=inplace)
+
+    assert_chan_equal(Chan('T', {'1m': df.copy()}, cache=cache, inplace=inplace), expected, '1m')
+    assert_chan_equal(Chan('T', {'1m': df.copy()}, cache=cache, inplace=inplace), expected, '1m')
+
+
+def test_cache_prefix_hit_matches_rebuild(tmp_path, generate_ohlcv, assert_chan_equal):
+    df = generate_ohlcv(4000, 8)
+    cache = LayerCache(str(tmp_path))
+    Chan('T', {'1m': df.iloc[:3000].copy()}, cache=cache)
+
+    assert_chan_equal(Chan('T', {'1m': df.copy()}, cache=cache), Chan('T', {'1m': df.copy()}), '1m')
+
+    chan = Chan('T', {'1m': df.iloc[:3000].copy()}, cache=cache)
+    chan.update('1m', df.iloc[3000:].copy())
+    assert_chan_equal(chan, Chan('T', {'1m': df.copy()}), '1m')
+
+
+def test_cache_miss_on_changed_history(tmp_path, generate_ohlcv, assert_chan_equal):
+    df = generate_ohlcv(3000, 9)
+    cache = LayerCache(str(tmp_path))
+    Chan('T', {'1m': df.copy()}, cache=cache)
+
+    changed = df.copy()
+    changed.iloc[10, changed.columns.get_loc('High')] += 1.0
+    assert_chan_equal(Chan('T', {'1m': changed.copy()}, cache=cache), Chan('T', {'1m': changed.copy()}), '1m')
+
+
+def test_cache_hit_normalizes_sources_like_a_miss(tmp_path, generate_ohlcv):
+    df = generate_ohlcv(3000, 10)
+    cache = LayerCache(str(tmp_path))
+    missed, hit = df.copy(), df.copy()
+    Chan('T', {'1m': missed}, cache=cache)
+    chan = Chan('T', {'1m': hit}, cache=cache)
+
+    pd.testing.assert_frame_equal(hit, missed)
+    assert chan.sources['1m'] is hit
+
+
+def test_cache_ignores_unknown_state_types(tmp_path, generate_ohlcv, assert_chan_equal):
+    df = generate_ohlcv(3000, 11)
+    cache = LayerCache(str(tmp_path))
+    Chan('T', {'1m': df.copy()}, cache=cache)
+
+    paths = list(tmp_path.glob('*/*/state.json'))
+    assert len(paths) == 1 and not list(tmp_path.glob('*/*/*.pkl'))
+    state = json.loads(paths[0].read_text())
+    state['_source_states'] = {'type': 'Popen', 'values': [['touch', str(tmp_path / 'executed')]]}
+    paths[0].write_text(json.dumps(state))
+
+    assert_chan_equal(Chan('T', {'1m': df.copy()}, cache=cache), Chan('T', {'1m': df.copy()}), '1m')
+    assert not (tmp_path / 'executed').exists()
@@ -0,0 +1,67 @@
+import threading
+
+import pytest
+
+from pychanlun.chan import Chan
+
+GETTERS = ('get_sticks', 'get_strokes', 'get_segment_pivot_signals')
+
+
+def read_concurrently(chan, getter, threads=4):
+    barrier = threading.Barrier(threads)
+    results = [None] * threads
+    errors = []
+
+    def read(slot):
+        try:
+            barrier.wait()
+            results[slot] = getattr(chan, getter)('1m')
+        except Exception as e:
+            errors.append(e)
+
+    workers = [threading.Thread(target=read, args=(slot,)) for slot in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert not errors, errors
+    return results
+
+
+@pytest.mark.parametrize('getter', GETTERS)
+def test_concurrent_first_reads(generate_ohlcv, assert_chan_equal, getter):
+    df = generate_ohlcv(30000, 13)
+    chan = Chan('T', {'1m': df.copy()})
+    expected = getattr(Chan('T', {'1m': df.copy()}), getter)('1m')
+
+    for result in read_concurrently(chan, getter):
+        assert result.equals(expected)
+    assert_chan_equal(chan, Chan('T', {'1m': df.copy()}), '1m')
+
+
+def test_concurrent_reads_during_updates(generate_ohlcv, assert_chan_equal):
+    df = generate_ohlcv(6000, 14)
+    chan = Chan('T', {'1m': df.iloc[:3000].copy()})
+    done = threading.Event()
+    errors = []
+
+    def read():
+        while not done.is_set():
+            try:
+                chan.get_segment_pivot_signals('1m')
+                chan.get_strokes('1m')
+            except Exception as e:
+                errors.append(e)
+                return
+
+    readers = [threading.Thread(target=read) for _ in range(3)]
+    for reader in readers:
+        reader.start()
+    for position in range(3000, len(df), 50):
+        chan.update('1m', df.iloc[position:position + 50].copy())
+    done.set()
+    for reader in readers:
+        reader.join()
+
+    assert not errors, errors
+    assert_chan_equal(chan, Chan('T', {'1m': df.copy()}), '1m')
@@ -0,0 +1,26 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+
+from pychanlun.chan import Chan
+
+
+@pytest.mark.parametrize('executor_type', (ThreadPoolExecutor, ProcessPoolExecutor))
+@pytest.mark.parametrize('inplace', (True, False))
+def test_executor_build_matches_sequential_build(generate_ohlcv, assert_chan_equal, executor_type, inplace):
+    sources = {'1m': generate_ohlcv(2000, 1), '5m': generate_ohlcv(800, 2)}
+    expected_sources = {interval: df.copy() for interval, df in sources.items()}
+    expected = Chan('T', expected_sources, inplace=inplace)
+    for interval in sources:
+        expected.get_sources(interval)
+
+    actual_sources = {interval: df.copy() for interval, df in sources.items()}
+    with executor_type(2) as executor:
+        actual = Chan('T', actual_sources, executor, inplace=inplace)
+
+    for interval in sources:
+        assert_chan_equal(actual, expected, interval)
+        pd.testing.assert_frame_equal(actual_sources[interval], expected_sources[interval], check_freq=False)
+        if inplace:
+            assert actual.get_sources(interval) is actual_sources[interval]
@@ -0,0 +1,50 @@
+import pandas as pd
+import pytest
+
+from pychanlun.chan import Chan
+from pychanlun.export import ChanExport
+from conftest import load_benchmarks
+
+pytest.importorskip('pyarrow')
+
+SYMBOLS = [f'S{number}' for number in range(6)]
+
+
+def load(symbol):
+    df = load_benchmarks().generate_ohlcv(1200, int(symbol[1:]) if symbol[1:].isdigit() else 0)
+    if symbol == 'BAD':
+        return {'1m': df, '1d': df.drop(columns='Close')}
+    if int(symbol[1:]) % 2:
+        df = df.assign(Volume=df['Volume'].astype(float), Dividends=0.0)
+    return {'1m': df}
+
+
+def assert_exported(directory, symbols):
+    for layer in ('sources', 'strokes'):
+        df = ChanExport.load(directory, '1m', layer)
+        assert sorted(df['symbol'].unique()) == sorted(symbols)
+        for symbol in symbols:
+            expected = getattr(Chan(symbol, load(symbol)), f'get_{layer}')('1m')
+            actual = df[df['symbol'] == symbol].drop(columns='symbol')
+            assert len(actual) == len(expected)
+            assert list(actual.columns) == [column for column in expected.columns if column != 'dividends']
+
+
+def test_failing_symbol_is_not_exported(tmp_path):
+    export = ChanExport(load, str(tmp_path), SYMBOLS[:3] + ['BAD'] + SYMBOLS[3:], buckets=2, max_workers=2)
+    export.run()
+
+    assert list(export.errors) == ['BAD']
+    assert_exported(str(tmp_path), SYMBOLS)
+
+
+def test_sources_share_one_schema(tmp_path):
+    progress = []
+    export = ChanExport(load, str(tmp_path), SYMBOLS, buckets=1, max_workers=2,
+                        progress=lambda done, total, symbol: progress.append((done, total)))
+    export.run()
+
+    assert not export.errors
+    assert progress == [(done, len(SYMBOLS)) for done in range(1, len(SYMBOLS) + 1)]
+    assert ChanExport.load(str(tmp_path), '1m', 'sources')['volume'].dtype == float
+    assert_exported(str(tmp_path), SYMBOLS)
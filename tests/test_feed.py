@@ -0,0 +1,79 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+
+from pychanlun.chan import Chan, CHANGE_LAYERS
+from pychanlun.feed import ChanFeed
+from pychanlun.signal import SignalType
+
+
+def test_process_executor_is_rejected():
+    with ProcessPoolExecutor(1) as executor:
+        with pytest.raises(ValueError, match='ThreadPoolExecutor'):
+            ChanFeed(executor=executor)
+
+
+def test_feed_matches_full_rebuild(generate_ohlcv, assert_chan_equal):
+    df = generate_ohlcv(3000, 15)
+
+    async def bars():
+        for position in range(1000, len(df), 100):
+            yield df.iloc[position:position + 100].copy()
+
+    async def run(feed):
+        await feed.run({('T', '1m'): bars()})
+
+    with ThreadPoolExecutor(2) as executor:
+        feed = ChanFeed({'T': {'1m': df.iloc[:1000].copy()}}, executor=executor)
+        asyncio.run(run(feed))
+
+    assert not feed.errors
+    assert_chan_equal(feed.chans['T'], Chan('T', {'1m': df.copy()}), '1m')
+
+
+def test_events_rebuild_every_layer(generate_ohlcv):
+    df = generate_ohlcv(3000, 16)
+    updates = []
+
+    async def bars():
+        for position in range(1000, len(df), 50):
+            yield df.iloc[position:position + 50].copy()
+            await asyncio.sleep(0)
+
+    async def run(feed):
+        await feed.run({('T', '1m'): bars()})
+        while not feed.events.empty():
+            updates.append(feed.events.get_nowait())
+
+    feed = ChanFeed({'T': {'1m': df.iloc[:1000].copy()}})
+    asyncio.run(run(feed))
+
+    frames = {}
+    kinds = {layer: set() for layer in CHANGE_LAYERS}
+    for event in updates:
+        assert (event.symbol, event.interval) == ('T', '1m')
+        assert event.layer in CHANGE_LAYERS
+        previous = frames.get(event.layer)
+        if previous is None:
+            assert event.row == 0
+            frames[event.layer] = event.frame
+            continue
+
+        assert 0 <= event.row <= len(previous)
+        if event.row + len(event.frame) > len(previous):
+            kinds[event.layer].add('new')
+        if event.row < len(previous):
+            kinds[event.layer].add('revised')
+            assert event.frame.empty or not event.frame.iloc[:1].equals(previous.iloc[event.row:event.row + 1])
+        frames[event.layer] = pd.concat([previous.iloc[:event.row], event.frame])
+
+    expected = Chan('T', {'1m': df.copy()})
+    for layer in CHANGE_LAYERS:
+        pd.testing.assert_frame_equal(frames[layer], getattr(expected, f'get_{layer}')('1m'), check_exact=True,
+                                      check_freq=False, obj=layer)
+        if layer.endswith('signals'):
+            assert set(frames[layer]['signal']) <= {int(signal) for signal in SignalType}
+    assert kinds['strokes'] == kinds['segments'] == {'new', 'revised'}
+    assert 'new' in kinds['stroke_pivot_signals']
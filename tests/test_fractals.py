@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from pychanlun.chan import Chan
+
+
+def make_bars(highs, lows):
+    index = pd.date_range('2024-01-01', periods=len(highs), freq='1min', name='datetime')
+    highs, lows = np.asarray(highs, dtype=float), np.asarray(lows, dtype=float)
+    return pd.DataFrame({'Open': lows, 'High': highs, 'Low': lows, 'Close': highs, 'Volume': 1}, index=index)
+
+
+def classify_fractals(sticks):
+    rows = []
+    for index in range(1, len(sticks)):
+        prev, curr = sticks[index - 1], sticks[index]
+        following = sticks[index + 1] if index < len(sticks) - 1 else None
+        if curr['high'] > prev['high'] and (following is None or curr['high'] > following['high']):
+            rows.append((int(curr['position']), float(curr['high']), np.nan))
+        elif curr['low'] < prev['low'] and (following is None or curr['low'] < following['low']):
+            rows.append((int(curr['position']), np.nan, float(curr['low'])))
+        else:
+            rows.append((int(curr['position']), np.nan, np.nan))
+    return rows
+
+
+def assert_fractals(chan):
+    fractals = chan.fractals['1m']
+    expected = classify_fractals(chan.sticks['1m'])
+    actual = [] if fractals is None else list(zip(*(fractals[name].tolist() for name in ('position', 'high', 'low'))))
+    np.testing.assert_array_equal(np.array(actual, dtype=float).reshape(-1, 3),
+                                  np.array(expected, dtype=float).reshape(-1, 3))
+
+
+def test_tops_and_bottoms():
+    highs = [10, 12, 11, 13, 14, 9, 10, 8]
+    fractals = Chan('T', {'1m': make_bars(highs, [high - 2 for high in highs])}).fractals['1m']
+
+    assert fractals['position'].tolist() == [1, 2, 3, 4, 5, 6, 7]
+    np.testing.assert_array_equal(fractals['high'], [12, np.nan, np.nan, 14, np.nan, 10, np.nan])
+    np.testing.assert_array_equal(fractals['low'], [np.nan, 9, np.nan, np.nan, 7, np.nan, 6])
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_fractals_match_a_scalar_scan(generate_ohlcv, seed):
+    assert_fractals(Chan('T', {'1m': generate_ohlcv(5000, seed)}))
+
+
+def test_updates_rescan_the_changed_sticks(generate_ohlcv):
+    df = generate_ohlcv(600, 8)
+    chan = Chan('T', {'1m': df.iloc[:50].copy()})
+    for position in range(50, len(df), 3):
+        chan.update('1m', df.iloc[position:position + 3].copy())
+        assert_fractals(chan)
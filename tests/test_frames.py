@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from pychanlun.chan import Chan
+
+GETTERS = ('get_sources', 'get_sticks', 'get_strokes', 'get_stroke_pivots', 'get_segment_pivot_signals',
+           'get_memberships')
+
+
+@pytest.mark.parametrize('getter', GETTERS)
+def test_repeated_calls_share_a_read_only_frame(generate_ohlcv, getter):
+    chan = Chan('T', {'1m': generate_ohlcv(3000, 1)}, inplace=False)
+    first, second = getattr(chan, getter)('1m'), getattr(chan, getter)('1m')
+
+    assert first is not second
+    for column in first.columns:
+        values = first[column].to_numpy()
+        assert np.shares_memory(values, second[column].to_numpy())
+        assert not values.flags.writeable
+        with pytest.raises(ValueError):
+            values[0] = values[-1]
+
+
+@pytest.mark.parametrize('getter', GETTERS)
+def test_mutating_a_returned_frame_keeps_the_cache(generate_ohlcv, getter):
+    chan = Chan('T', {'1m': generate_ohlcv(3000, 2)}, inplace=False)
+    expected = getattr(chan, getter)('1m').copy()
+
+    frame = getattr(chan, getter)('1m')
+    column = frame.columns[-1]
+    frame.iloc[0, -1] = frame.iloc[-1, -1]
+    frame[column] = frame[column].iloc[::-1].to_numpy()
+    frame['extra'] = 1
+    frame.drop(index=frame.index[:5], inplace=True)
+
+    pd.testing.assert_frame_equal(getattr(chan, getter)('1m'), expected)
+
+
+@pytest.mark.parametrize('getter', GETTERS)
+def test_update_invalidates_the_cached_frame(generate_ohlcv, getter):
+    df = generate_ohlcv(3000, 3)
+    chan = Chan('T', {'1m': df.iloc[:2000].copy()}, inplace=False)
+    before = getattr(chan, getter)('1m')
+
+    chan.update('1m', df.iloc[2000:].copy())
+    after = getattr(chan, getter)('1m')
+    expected = getattr(Chan('T', {'1m': df.copy()}, inplace=False), getter)('1m')
+    assert not before.equals(expected)
+    pd.testing.assert_frame_equal(after, expected, check_freq=False)
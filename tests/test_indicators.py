@@ -0,0 +1,23 @@
+import pytest
+
+from pychanlun.chan import Chan
+from pychanlun.indicator import Macd, MovingAverage
+from pychanlun.stroke import Stroke
+
+
+@pytest.mark.parametrize('inplace', (True, False))
+def test_plan_without_macd_is_rejected(generate_ohlcv, inplace):
+    with pytest.raises(ValueError, match='Macd'):
+        Chan('T', {'1m': generate_ohlcv(500)}, inplace=inplace, indicators=[MovingAverage(5)])
+
+
+def test_plan_of_macd_is_enough_for_structure(generate_ohlcv):
+    df = generate_ohlcv(3000, 1)
+    chan = Chan('T', {'1m': df.copy()}, indicators=[Macd(12, 26, 9)])
+    assert chan.get_segment_pivot_signals('1m').equals(Chan('T', {'1m': df.copy()}).get_segment_pivot_signals('1m'))
+
+
+def test_layers_below_pivots_need_no_macd(generate_ohlcv):
+    df = generate_ohlcv(3000, 2)
+    stroke = Stroke('T', {'1m': df.copy()}, indicators=[MovingAverage(5)])
+    assert stroke.strokes['1m'].tobytes() == Chan('T', {'1m': df.copy()}).strokes['1m'].tobytes()
@@ -0,0 +1,80 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pytest
+
+from pychanlun.chan import Chan
+from pychanlun.stock import Layer
+
+SOURCES = {'sources': None, 'sticks': 'sources', 'fractals': 'sticks', 'strokes': 'fractals'}
+
+
+def layer_names(chan):
+    return {name for name, layer in vars(chan).items() if isinstance(layer, Layer)}
+
+
+def assert_counts(chan, interval, stats):
+    for name, stage in stats.items():
+        layer = getattr(chan, name)
+        value = layer[interval]
+        assert stage.output_rows == (0 if value is None else len(value)), name
+        if layer.source is None:
+            assert stage.input_rows == len(chan._raw_sources[interval]), name
+        else:
+            inputs = chan._stage_input(layer.source, interval)
+            assert stage.input_rows == (0 if inputs is None else len(inputs)), name
+        assert stage.seconds >= 0 and stage.allocated_bytes is None
+
+
+def test_callback_receives_every_computed_stage(generate_ohlcv):
+    chan = Chan('T', {'1m': generate_ohlcv(2000, 1)})
+    calls = []
+    chan.instrument(callback=lambda interval, stage, stats: calls.append((interval, stage, stats)))
+    chan.get_stroke_pivot_signals('1m')
+    chan.get_segment_pivot_signals('1m')
+    chan.get_memberships('1m')
+
+    stats = chan.stats('1m')
+    assert set(stats) == layer_names(chan)
+    assert [stage for _, stage, _ in calls[:4]] == list(SOURCES)
+    assert {stage: value for _, stage, value in calls} == stats
+    assert all(interval == '1m' for interval, _, _ in calls)
+    assert_counts(chan, '1m', stats)
+
+
+def test_update_records_the_recomputed_stages(generate_ohlcv):
+    df = generate_ohlcv(2500, 2)
+    chan = Chan('T', {'1m': df.iloc[:2000].copy()})
+    chan.instrument()
+    chan.get_segment_pivot_signals('1m')
+    before = chan.stats('1m')
+
+    chan.update('1m', df.iloc[2000:].copy())
+    chan.get_strokes('1m')
+    after = chan.stats('1m')
+    assert before['sources'].input_rows == before['sources'].output_rows == 2000
+    assert after['sources'].input_rows == 500 and after['sources'].output_rows == 2500
+    assert after['sticks'].input_rows == 2500
+    assert all(after[name] is not before[name] for name in SOURCES)
+    assert after['segments'] is before['segments']
+    assert_counts(chan, '1m', {name: after[name] for name in SOURCES if name != 'sources'})
+
+
+def test_disabled_instrumentation_records_nothing(generate_ohlcv):
+    chan = Chan('T', {'1m': generate_ohlcv(1000, 3)})
+    calls = []
+    chan.instrument(callback=lambda *args: calls.append(args), enabled=False)
+    chan.get_strokes('1m')
+
+    assert chan.stats('1m') == {} and calls == []
+
+
+@pytest.mark.parametrize('executor_type', (ThreadPoolExecutor, ProcessPoolExecutor))
+def test_executor_build_returns_worker_stats(generate_ohlcv, executor_type):
+    sources = {'1m': generate_ohlcv(2000, 4), '5m': generate_ohlcv(600, 5)}
+    with executor_type(2) as executor:
+        chan = Chan('T', sources, executor)
+
+    for interval in sources:
+        stats = chan.stats(interval)
+        assert set(stats) == layer_names(chan) - {'memberships'}
+        assert_counts(chan, interval, stats)
@@ -0,0 +1,18 @@
+import numpy as np
+import pytest
+
+from pychanlun.chan import Chan
+from pychanlun.mapped import MappedSource
+
+
+@pytest.mark.parametrize('tz', (None, 'America/New_York'))
+def test_mapped_source_matches_frame(tmp_path, generate_ohlcv, assert_chan_equal, tz):
+    df = generate_ohlcv(4000, 10)
+    if tz is not None:
+        df.index = df.index.tz_localize(tz)
+    np.save(tmp_path / 'datetime.npy', (df.index if tz is None else df.index.tz_convert(None)).to_numpy())
+    for column in df.columns:
+        np.save(tmp_path / f'{column}.npy', df[column].to_numpy())
+
+    chan = Chan('T', {'1m': MappedSource.from_npy(str(tmp_path), tz)})
+    assert_chan_equal(chan, Chan('T', {'1m': df.copy()}), '1m')
@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+
+from pychanlun.chan import Chan
+
+HIGHS = [10, 12, 14, 15, 17, 19, 18]
+LOWS = [5, 7, 9, 8, 11, 13, 14]
+
+
+def make_bars(highs, lows):
+    index = pd.date_range('2024-01-01', periods=len(highs), freq='1min', name='datetime')
+    highs, lows = np.asarray(highs, dtype=float), np.asarray(lows, dtype=float)
+    return pd.DataFrame({'Open': lows, 'High': highs, 'Low': lows, 'Close': highs, 'Volume': 1}, index=index)
+
+
+def test_outside_merge_bars_belong_to_the_merged_stick():
+    chan = Chan('T', {'1m': make_bars(HIGHS, LOWS)})
+
+    assert chan.sticks['1m']['position'].tolist() == [0, 1, 3, 4, 5]
+    assert chan.sticks['1m']['start'].tolist() == [0, 1, 2, 4, 5]
+    assert chan.get_membership('1m', np.arange(len(HIGHS)))['stick'].tolist() == [0, 1, 2, 2, 3, 4, 4]
+
+
+def test_stick_memberships_survive_updates():
+    bars = make_bars(HIGHS, LOWS)
+    for first in range(1, len(HIGHS)):
+        chan = Chan('T', {'1m': bars.iloc[:first].copy()})
+        chan.get_memberships('1m')
+        for position in range(first, len(HIGHS)):
+            chan.update('1m', bars.iloc[position:position + 1].copy())
+            chan.get_memberships('1m')
+
+        assert chan.get_membership('1m', np.arange(len(HIGHS)))['stick'].tolist() == [0, 1, 2, 2, 3, 4, 4]
@@ -0,0 +1,82 @@
+import pandas as pd
+import pytest
+
+from pychanlun.chan import Chan, NESTING_LAYERS
+
+AGGREGATIONS = {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'}
+
+
+@pytest.fixture(scope='module')
+def chan(generate_ohlcv):
+    df = generate_ohlcv(12000, 3)
+    higher = df.resample('30min').agg(AGGREGATIONS).dropna()
+    return Chan('T', {'1m': df, '30m': higher, 'short': df.iloc[:40].copy()})
+
+
+def find_bounds(items, layer):
+    positions = items['position'].tolist()
+    if layer in ('strokes', 'segments'):
+        return positions[:-1], positions[1:]
+    return positions[::2], positions[1::2]
+
+
+def scan_nestings(chan, interval, layer, lower_interval, lower_layer):
+    index, lower_index = chan.get_index(interval), chan.get_index(lower_interval)
+    lower_items = getattr(chan, lower_layer)[lower_interval]
+    if lower_items is None:
+        lower_starts = lower_ends = []
+    elif lower_layer in ('strokes', 'segments'):
+        lower_starts = lower_ends = lower_items['position'].tolist()
+    else:
+        lower_starts, lower_ends = find_bounds(lower_items, lower_layer)
+
+    rows = []
+    for start, end in zip(*find_bounds(getattr(chan, layer)[interval], layer)):
+        first_bar = next(j for j in range(len(lower_index) + 1)
+                         if j == len(lower_index) or lower_index[j] >= index[start])
+        last_bar = len(lower_index) if end + 1 == len(index) else next(
+            j for j in range(len(lower_index) + 1) if j == len(lower_index) or lower_index[j] >= index[end + 1])
+        inside = [k for k in range(len(lower_starts)) if lower_starts[k] >= first_bar and lower_ends[k] < last_bar]
+        first = inside[0] if inside else sum(value < first_bar for value in lower_starts)
+        rows.append((first_bar, last_bar, first, first + len(inside)))
+    return rows
+
+
+@pytest.mark.parametrize('layer', NESTING_LAYERS)
+@pytest.mark.parametrize('lower_layer', NESTING_LAYERS)
+def test_nestings_match_a_range_scan(chan, layer, lower_layer):
+    nestings = chan.get_nestings('30m', layer, '1m', lower_layer)
+    expected = scan_nestings(chan, '30m', layer, '1m', lower_layer)
+
+    assert len(expected) > 0
+    assert list(nestings[['start', 'end', 'first', 'last']].itertuples(index=False, name=None)) == expected
+    assert nestings['end'].iloc[-1] <= len(chan.get_index('1m'))
+
+    frame = getattr(chan, f'get_{lower_layer}')('1m')
+    for row in (0, len(expected) // 2, -1):
+        first, last = expected[row][2:]
+        pd.testing.assert_frame_equal(chan.get_nested('30m', layer, row, '1m', lower_layer), frame.iloc[first:last])
+
+
+def test_nestings_over_an_empty_lower_layer(chan):
+    assert chan.segment_pivots['short'] is None
+    nestings = chan.get_nestings('30m', 'strokes', 'short', 'segment_pivots')
+
+    assert list(nestings[['start', 'end', 'first', 'last']].itertuples(index=False, name=None)) == \
+        scan_nestings(chan, '30m', 'strokes', 'short', 'segment_pivots')
+    assert (nestings['first'] == 0).all() and (nestings['last'] == 0).all()
+    assert chan.get_nested('30m', 'strokes', -1, 'short', 'segment_pivots') is None
+
+
+def test_nested_row_out_of_range(chan):
+    rows = len(chan.get_nestings('30m', 'strokes', '1m', 'strokes'))
+    with pytest.raises(IndexError):
+        chan.get_nested('30m', 'strokes', rows, '1m', 'strokes')
+
+
+def test_last_row_runs_to_the_end_of_the_lower_interval(chan):
+    assert chan.strokes['30m']['position'][-1] == len(chan.get_index('30m')) - 1
+    nestings = chan.get_nestings('30m', 'strokes', '1m', 'strokes')
+
+    assert nestings['end'].iloc[-1] == len(chan.get_index('1m'))
+    assert nestings['last'].iloc[-1] == len(chan.strokes['1m'])
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from pychanlun.chan import Chan
+
+
+def sum_macd(sources, start, end, level):
+    window = sources.iloc[start:end]
+    mask = np.ones(len(window), dtype=bool)
+    if level > 0:
+        mask = window['macd'].to_numpy() > window['macd_dea'].to_numpy()
+    elif level < 0:
+        mask = window['macd'].to_numpy() < window['macd_dea'].to_numpy()
+    return window['macd_dif'].to_numpy()[mask].sum()
+
+
+def assert_macd_areas(chan, layer):
+    sources, pivots = chan.get_sources('1m'), getattr(chan, layer)['1m']
+    entries, exits = pivots[::2], pivots[1::2]
+    assert len(exits) > 2
+    for row in range(len(exits)):
+        if row + 1 < len(entries):
+            start, end, level = exits[row]['position'], entries[row + 1]['position'] + 1, entries[row + 1]['level']
+            assert entries[row + 1]['macd'] == exits[row]['macd']
+        else:
+            start, end, level = exits[row]['position'], len(sources), 0
+        assert np.isclose(exits[row]['macd'], sum_macd(sources, start, end, level), rtol=1e-9, atol=1e-9), (layer, row)
+
+
+@pytest.mark.parametrize('layer', ('stroke_pivots', 'segment_pivots'))
+def test_macd_areas_match_direct_sums(generate_ohlcv, layer):
+    assert_macd_areas(Chan('T', {'1m': generate_ohlcv(20000, 5)}), layer)
+
+
+@pytest.mark.parametrize('layer', ('stroke_pivots', 'segment_pivots'))
+def test_macd_areas_extend_with_updates(generate_ohlcv, layer):
+    df = generate_ohlcv(20000, 6)
+    chan = Chan('T', {'1m': df.iloc[:12000].copy()})
+    for position in range(12000, len(df), 2000):
+        getattr(chan, layer)['1m']
+        chan.update('1m', df.iloc[position:position + 2000].copy())
+        assert_macd_areas(chan, layer)
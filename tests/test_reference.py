@@ -0,0 +1,39 @@
+import os
+
+import numpy as np
+import pytest
+
+from pychanlun.chan import Chan
+from conftest import is_rolling
+
+REFERENCE = os.path.join(os.path.dirname(__file__), 'data', 'reference.npz')
+DATASETS = ((0, 8000), (1, 3000))
+SOURCE_STRIDE = 10
+
+
+@pytest.fixture(scope='module')
+def reference():
+    with np.load(REFERENCE, allow_pickle=False) as data:
+        return {name: data[name] for name in data.files}
+
+
+@pytest.mark.parametrize('seed, bars', DATASETS)
+def test_layers_match_reference(reference, benchmarks, generate_ohlcv, seed, bars):
+    chan = Chan('T', {'1m': generate_ohlcv(bars, seed)})
+    for getter in benchmarks.GETTERS:
+        df = getattr(chan, getter)('1m')
+        if getter == 'get_sources':
+            df = df.iloc[::SOURCE_STRIDE]
+        prefix = f'{seed}/{getter}/'
+        columns = [name[len(prefix):] for name in reference if name.startswith(prefix) and name != prefix + 'index']
+        assert list(df.columns) == columns, getter
+        np.testing.assert_array_equal(df.index.as_unit('ns').asi8, reference[prefix + 'index'], err_msg=getter)
+        for column in columns:
+            values, expected = df[column].to_numpy(), reference[prefix + column]
+            if values.dtype.kind == 'M':
+                values = values.astype('datetime64[ns]').view(np.int64)
+            assert values.dtype == expected.dtype, (getter, column)
+            if is_rolling(column):
+                np.testing.assert_allclose(values, expected, rtol=1e-9, err_msg=f'{getter} {column}')
+            else:
+                np.testing.assert_array_equal(values, expected, err_msg=f'{getter} {column}')
@@ -0,0 +1,37 @@
+import pandas as pd
+import pytest
+
+from pychanlun.chan import Chan, CHANGE_LAYERS
+from pychanlun.replay import ChanReplay, ReplayAction
+
+
+def replay_state(log, at):
+    rows = []
+    values = [column for column in log.columns if column not in ('action', 'row', 'at')]
+    for _, entry in log[log.index <= at].iterrows():
+        row = int(entry['row'])
+        if entry['action'] == ReplayAction.RETRACTED:
+            del rows[row:]
+        elif row < len(rows):
+            rows[row] = (entry['at'], *entry[values])
+        else:
+            assert row == len(rows)
+            rows.append((entry['at'], *entry[values]))
+    return rows
+
+
+def frame_state(df):
+    return [] if df is None else [(at, *values) for at, values in zip(df.index, df.itertuples(index=False))]
+
+
+@pytest.mark.parametrize('seed, start, step', ((11, 0, 1), (12, 300, 7)))
+def test_replay_matches_prefix_rebuilds(generate_ohlcv, seed, start, step):
+    df = generate_ohlcv(1200, seed)
+    logs = ChanReplay('T', {'1m': df.copy()}, start=start, step=step).run()['1m']
+
+    for bar in (*range(max(start, 1) - 1 + step, len(df), 97 * step), len(df) - 1):
+        prefix = Chan('T', {'1m': df.iloc[:bar + 1].copy()})
+        for name in CHANGE_LAYERS:
+            expected = pd.DataFrame(frame_state(getattr(prefix, f'get_{name}')('1m')))
+            actual = pd.DataFrame(replay_state(logs[name], df.index[bar]))
+            pd.testing.assert_frame_equal(actual, expected, check_dtype=False, obj=f'{name} at {bar}')
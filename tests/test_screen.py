@@ -0,0 +1,79 @@
+import pandas as pd
+import pytest
+
+from pychanlun.chan import Chan
+from pychanlun.screen import ChanScreen, LEVELS
+from pychanlun.signal import SignalType
+
+WINDOWS = (
+    {},
+    {'start': '2000-01-05 10:00', 'end': '2000-01-11 14:00'},
+    {'start': '2000-01-06 10:00'},
+    {'end': '2000-01-07 11:30', 'last_n': 400},
+    {'last_n': 150}
+)
+
+
+@pytest.fixture(scope='module')
+def chans(generate_ohlcv):
+    chans = {}
+    for number in range(6):
+        df = generate_ohlcv(4000, number + 20)
+        if number % 2:
+            df.index = df.index.tz_localize('Asia/Shanghai')
+        chans[f'S{number}'] = Chan(f'S{number}', {'1m': df})
+    return chans
+
+
+def find_pivot_rows(chan, level, window):
+    index = chan.get_index('1m')
+    first, last = 0, len(index)
+    if 'start' in window:
+        first = index.searchsorted(Chan.to_timestamp(window['start'], index.tz), side='left')
+    if 'end' in window:
+        last = index.searchsorted(Chan.to_timestamp(window['end'], index.tz), side='right')
+    if 'last_n' in window:
+        first = max(last - window['last_n'], 0)
+    entries = getattr(chan, f'{level}_pivots')['1m'][::2]
+    return entries[(entries['position'] >= first) & (entries['position'] < last)]
+
+
+@pytest.mark.parametrize('window', WINDOWS)
+@pytest.mark.parametrize('level', LEVELS)
+def test_signals_match_chan_getters(chans, level, window):
+    screen = ChanScreen(chans)
+    for signal in SignalType:
+        expected = set()
+        for symbol, chan in chans.items():
+            signals = getattr(chan, f'get_{level}_pivot_signals')('1m', **window)
+            if signals is not None and (signals['signal'] == signal).any():
+                expected.add(symbol)
+        assert screen.find_signals('1m', level, signal, **window) == expected, signal
+
+
+@pytest.mark.parametrize('window', WINDOWS)
+@pytest.mark.parametrize('level', LEVELS)
+def test_pivots_match_chan_layers(chans, level, window):
+    screen = ChanScreen(chans)
+    rows = {symbol: find_pivot_rows(chan, level, window) for symbol, chan in chans.items()}
+    assert screen.find_pivots('1m', level, **window) == {symbol for symbol, entries in rows.items() if len(entries)}
+    for status in (-1, 0, 1):
+        expected = {symbol for symbol, entries in rows.items() if (entries['status'] == status).any()}
+        assert screen.find_pivots('1m', level, status=status, **window) == expected
+    for pivot_level in (1, 2):
+        expected = {symbol for symbol, entries in rows.items() if (entries['level'] == pivot_level).any()}
+        assert screen.find_pivots('1m', level, pivot_level=pivot_level, **window) == expected
+
+
+def test_update_and_remove_reindex_one_symbol(chans):
+    screen = ChanScreen(chans)
+    signal = SignalType.FIRST_BUY
+    found = screen.find_signals('1m', 'stroke', signal)
+    symbol = sorted(found)[0]
+
+    screen.remove(symbol)
+    assert screen.find_signals('1m', 'stroke', signal) == found - {symbol}
+    screen.update(symbol, chans[symbol])
+    assert screen.find_signals('1m', 'stroke', signal) == found
+    with pytest.raises(ValueError):
+        screen.find_signals('1m', 'stroke', signal, start='2000-01-05', last_n=10)
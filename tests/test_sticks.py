@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from pychanlun.chan import Chan
+from pychanlun.stick import Stick
+
+
+def make_bars(highs, lows):
+    index = pd.date_range('2024-01-01', periods=len(highs), freq='1min', name='datetime')
+    highs, lows = np.asarray(highs, dtype=float), np.asarray(lows, dtype=float)
+    return pd.DataFrame({'Open': lows, 'High': highs, 'Low': lows, 'Close': highs, 'Volume': 1}, index=index)
+
+
+def make_random_bars(size, seed):
+    rng = np.random.default_rng(seed)
+    lows = np.cumsum(rng.integers(-3, 4, size))
+    return make_bars(lows + rng.integers(0, 5, size), lows)
+
+
+def merge_sticks(highs, lows):
+    bars = list(zip(range(len(highs)), highs.tolist(), lows.tolist()))
+    start = next((index for index in range(len(bars) - 1) if
+                  (bars[index][1] < bars[index + 1][1] and bars[index][2] < bars[index + 1][2]) or
+                  (bars[index][1] > bars[index + 1][1] and bars[index][2] > bars[index + 1][2])), None)
+    if start is None:
+        return []
+
+    sticks = [bars[start]]
+    prev, curr = bars[start], bars[start + 1]
+    for bar in bars[start + 2:]:
+        is_going_up = prev[1] < curr[1] and prev[2] < curr[2]
+        if curr[1] >= bar[1] and curr[2] <= bar[2]:
+            curr = (curr[0], curr[1], bar[2]) if is_going_up else (curr[0], bar[1], curr[2])
+        elif curr[1] <= bar[1] and curr[2] >= bar[2]:
+            curr = (bar[0], bar[1], curr[2]) if is_going_up else (bar[0], curr[1], bar[2])
+        else:
+            sticks.append(curr)
+            prev, curr = curr, bar
+    sticks.append(curr)
+    return sticks
+
+
+def assert_sticks(chan, bars):
+    sticks = chan.sticks['1m']
+    expected = merge_sticks(bars['High'].to_numpy(), bars['Low'].to_numpy())
+    actual = [] if sticks is None else list(zip(*(sticks[name].tolist() for name in ('position', 'high', 'low'))))
+    assert actual == expected
+
+
+def test_inside_and_outside_merges():
+    bars = make_bars([10, 12, 11, 14, 13, 11, 12, 10, 8], [5, 7, 8, 6, 9, 7, 6, 7, 4])
+    sticks = Chan('T', {'1m': bars}).sticks['1m']
+
+    assert sticks['position'].tolist() == [0, 3, 6, 8]
+    assert sticks['high'].tolist() == [10, 14, 10, 8]
+    assert sticks['low'].tolist() == [5, 9, 6, 4]
+
+
+def test_no_direction_gives_no_sticks():
+    assert Chan('T', {'1m': make_bars([10, 10, 11, 12], [5, 5, 4, 3])}).sticks['1m'] is None
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_sticks_match_a_scalar_merge(seed):
+    bars = make_random_bars(3000, seed)
+    assert_sticks(Chan('T', {'1m': bars.copy()}), bars)
+
+
+@pytest.mark.parametrize('chunk_size', (2, 7, 64))
+def test_chunked_merge_matches_a_single_pass(monkeypatch, chunk_size):
+    bars = make_random_bars(1000, 9)
+    monkeypatch.setattr(Stick, 'CHUNK_SIZE', chunk_size)
+    assert_sticks(Chan('T', {'1m': bars.copy()}), bars)
+
+
+def test_bar_by_bar_updates_match_a_scalar_merge():
+    bars = make_random_bars(400, 11)
+    chan = Chan('T', {'1m': bars.iloc[:1].copy()})
+    for position in range(1, len(bars)):
+        chan.update('1m', bars.iloc[position:position + 1].copy())
+        assert_sticks(chan, bars.iloc[:position + 1])
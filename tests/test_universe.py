@@ -0,0 +1,49 @@
+import os
+
+import pandas as pd
+import pytest
+
+from pychanlun.chan import Chan
+from pychanlun.universe import ChanUniverse
+from conftest import load_benchmarks
+
+SYMBOLS = [f'S{number}' for number in range(8)]
+
+
+def load(symbol):
+    if symbol == 'CRASH':
+        os._exit(1)
+    return {'1m': load_benchmarks().generate_ohlcv(1500, int(symbol[1:]))}
+
+
+def assert_results(universe, symbols):
+    for symbol in symbols:
+        expected = Chan(symbol, load(symbol)).get_strokes('1m')
+        pd.testing.assert_frame_equal(universe.get(symbol, '1m', 'strokes'), expected, check_names=False,
+                                      check_freq=False)
+
+
+def test_worker_crash_fails_only_its_symbol():
+    symbols = SYMBOLS[:3] + ['CRASH'] + SYMBOLS[3:]
+    universe = ChanUniverse(load, symbols, max_workers=2)
+    universe.run()
+
+    assert list(universe.errors) == ['CRASH']
+    assert sorted(universe.results) == sorted(SYMBOLS)
+    assert_results(universe, SYMBOLS)
+
+
+def test_progress_error_is_raised_after_the_batch():
+    calls = []
+
+    def progress(done, total, symbol):
+        calls.append(done)
+        raise RuntimeError('progress')
+
+    universe = ChanUniverse(load, SYMBOLS, max_workers=2, progress=progress)
+    with pytest.raises(RuntimeError, match='progress'):
+        universe.run()
+
+    assert calls == [1]
+    assert not universe.errors
+    assert_results(universe, SYMBOLS)
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from pychanlun.chan import Chan, CHANGE_LAYERS
+
+CHUNKS = {
+    'bars': (1,),
+    'small': (1, 2, 3, 7),
+    'mixed': (1, 17, 50, 300)
+}
+
+
+@pytest.mark.parametrize('inplace', (True, False))
+@pytest.mark.parametrize('seed, first, chunks', (
+    (0, 0, 'bars'),
+    (1, 1, 'small'),
+    (2, 500, 'mixed'),
+    (3, 1500, 'mixed')
+))
+def test_update_matches_full_rebuild(generate_ohlcv, assert_chan_equal, inplace, seed, first, chunks):
+    df = generate_ohlcv(3000, seed)
+    full = Chan('T', {'1m': df.copy()}, inplace=inplace)
+    chan = Chan('T', {'1m': df.iloc[:first].copy()}, inplace=inplace)
+
+    rng = np.random.default_rng(seed)
+    position = first
+    while position < len(df):
+        size = int(rng.choice(CHUNKS[chunks]))
+        chan.update('1m', df.iloc[position:position + size].copy())
+        position += size
+
+    assert_chan_equal(chan, full, '1m')
+
+
+def test_update_between_reads_matches_full_rebuild(generate_ohlcv, assert_chan_equal):
+    df = generate_ohlcv(2000, 4)
+    chan = Chan('T', {'1m': df.iloc[:400].copy()})
+    for position in range(400, len(df), 97):
+        chan.get_segment_pivot_signals('1m')
+        chan.update('1m', df.iloc[position:position + 97].copy())
+        expected = Chan('T', {'1m': df.iloc[:position + 97].copy()})
+        assert_chan_equal(chan, expected, '1m')
+
+
+@pytest.mark.parametrize('seed, step', ((5, 1), (6, 13)))
+def test_changes_replay_to_current_layers(generate_ohlcv, seed, step):
+    df = generate_ohlcv(1500, seed)
+    chan = Chan('T', {'1m': df.iloc[:300].copy()})
+    frames = {name: None for name in CHANGE_LAYERS}
+    for position in range(300, len(df) + 1, step):
+        if position > 300:
+            chan.update('1m', df.iloc[position - step:position].copy())
+        for name, (row, changes) in chan.get_changes('1m', 'test').items():
+            frames[name] = changes if frames[name] is None else pd.concat([frames[name].iloc[:row], changes])
+        for name, frame in frames.items():
+            expected = getattr(chan, f'get_{name}')('1m')
+            if expected is None:
+                assert frame is None or frame.empty, name
+            else:
+                pd.testing.assert_frame_equal(frame, expected, check_exact=True, check_freq=False, obj=name)
@@ -0,0 +1,87 @@
+import pandas as pd
+import pytest
+
+from pychanlun.chan import Chan
+
+GETTERS = (
+    'get_sources', 'get_sticks', 'get_fractals', 'get_strokes', 'get_stroke_pivots', 'get_stroke_pivot_trends',
+    'get_stroke_pivot_signals', 'get_segments', 'get_segment_pivots', 'get_segment_pivot_trends',
+    'get_segment_pivot_signals', 'get_memberships'
+)
+
+
+@pytest.fixture(scope='module')
+def chan(generate_ohlcv):
+    df = generate_ohlcv(6000, 7)
+    df.index = df.index.tz_localize('Asia/Shanghai')
+    return Chan('T', {'1m': df})
+
+
+def select(frame, getter, start, end):
+    if 'pivot' in getter and not getter.endswith('signals'):
+        start, end = start.tz_convert(None), end.tz_convert(None)
+    if getter in ('get_strokes', 'get_segments'):
+        first, last = (frame.index < start).sum(), (frame.index <= end).sum()
+        return frame.iloc[max(first - 1, 0):last + 1]
+    inside = (frame.index >= start) & (frame.index <= end)
+    if 'pivot' in getter and not getter.endswith('signals'):
+        return frame[(frame.index <= end) & (frame['end'] >= start)]
+    return frame[inside]
+
+
+def assert_window(chan, getter, first, last, **window):
+    expected = select(getattr(chan, getter)('1m'), getter, first, last)
+    pd.testing.assert_frame_equal(getattr(chan, getter)('1m', **window), expected, check_freq=False, obj=getter)
+
+
+@pytest.mark.parametrize('getter', GETTERS)
+def test_start_and_end_are_inclusive(chan, getter):
+    index = chan.get_index('1m')
+    for lower, upper in ((1000, 1600), (0, 20), (5900, len(index) - 1), (3000, 3000)):
+        assert_window(chan, getter, index[lower], index[upper], start=index[lower], end=index[upper])
+
+
+@pytest.mark.parametrize('getter', GETTERS)
+def test_last_n_counts_back_from_end(chan, getter):
+    index = chan.get_index('1m')
+    assert_window(chan, getter, index[len(index) - 300], index[-1], last_n=300)
+    assert_window(chan, getter, index[2001], index[2500], end=index[2500], last_n=500)
+    assert_window(chan, getter, index[0], index[100], end=index[100], last_n=5000)
+    assert_window(chan, getter, index[-1] + pd.Timedelta(1), index[-1], last_n=0)
+
+
+def test_naive_bounds_use_the_index_timezone(chan):
+    index = chan.get_index('1m')
+    start, end = index[1200], index[1800]
+    expected = chan.get_strokes('1m', start=start, end=end)
+
+    naive = chan.get_strokes('1m', start=start.tz_localize(None), end=end.tz_localize(None))
+    utc = chan.get_strokes('1m', start=start.tz_convert('UTC'), end=str(end.tz_convert('UTC')))
+    pd.testing.assert_frame_equal(naive, expected)
+    pd.testing.assert_frame_equal(utc, expected)
+    assert chan.get_sources('1m', start=str(start.tz_localize(None))).index[0] == start
+
+
+def test_pairs_straddling_the_window_are_kept(chan):
+    pivots = chan.get_stroke_pivots('1m')
+    row = len(pivots) // 2
+    entry, exit = pivots.index[row], pivots['end'].iloc[row]
+    index = chan.get_index('1m')
+    middle = index[index.searchsorted(entry.tz_localize('UTC')) + 1]
+    after = index[index.searchsorted(exit.tz_localize('UTC')) + 1]
+    assert middle.tz_convert(None) < exit
+
+    assert entry in chan.get_stroke_pivots('1m', start=middle).index
+    assert entry in chan.get_stroke_pivots('1m', end=middle).index
+    assert entry in chan.get_stroke_pivots('1m', start=middle, end=middle).index
+    assert entry not in chan.get_stroke_pivots('1m', start=after).index
+
+    strokes = chan.get_strokes('1m', start=middle, end=middle)
+    assert len(strokes) == 2 and strokes.index[0] < middle < strokes.index[1]
+
+
+def test_invalid_windows_are_rejected(chan):
+    with pytest.raises(ValueError, match='start or last_n'):
+        chan.get_strokes('1m', start=chan.get_index('1m')[0], last_n=10)
+    with pytest.raises(ValueError, match='negative'):
+        chan.get_strokes('1m', last_n=-1)